@@ -1,20 +1,35 @@
 import streamlit as st
 from dotenv import load_dotenv
-import base64
-from PIL import Image
 import io
+import os
+import asyncio
+import hashlib
+import html
+import pickle
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from pathlib import Path
 
-from modules.chunker import chunk_data
+from modules.chunker import chunk_data_parallel
 from modules.document_loader import load_documents, load_from_text
-from modules.vectorstore import create_vector_store
+from modules.vectorstore import create_vector_store, load_vector_store
 from modules.retriever import create_retriever
 from modules.chain import create_rag_chain
+from modules.semantic_cache import AnswerCache, SemanticCache
+from modules.ui_templates import (
+    FEATURES_HTML,
+    FORMATS_HTML,
+    HISTORY_FOOTER_HTML,
+    HISTORY_HEADER_HTML,
+    HISTORY_ITEM_HTML,
+    UPLOAD_HTML,
+    WELCOME_HTML,
+)
 
-# Load environment variables
-load_dotenv()
-
-# Configure the page
+# Configure the page. This is per-run page state, so unlike the one-time
+# setup below it must be set on every run.
 st.set_page_config(
     page_title="SmartDoc AI - Intelligent Document Q&A",
     page_icon="📚",
@@ -22,69 +37,392 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+@st.cache_resource(show_spinner=False)
+def load_environment():
+    """Load environment variables from .env once per process, not on every rerun."""
+    return load_dotenv()
+
+# Load environment variables
+load_environment()
+
+CSS_PATH = Path(__file__).parent / "assets" / "app.css"
+
+# On-disk cache for processed corpora, keyed by a hash of the uploaded content
+CACHE_DIR = "cache"
+MANUAL_INPUT_SOURCE = "Manual Input"
+# Uploads are streamed to disk and hashed in blocks of this size, so memory
+# use stays O(block) regardless of file size
+SPOOL_BLOCK_SIZE = 4 * 1024 * 1024
+# Number of distinct questions whose answers are memoized per corpus
+ANSWER_CACHE_SIZE = 256
+# Corpora whose vector store and chain stay shared in server memory, and how
+# long (seconds) each entry lives; sessions keep their own references, so an
+# evicted corpus is only rebuilt for the next Process click
+CHAIN_CACHE_MAX_ENTRIES = 8
+CHAIN_CACHE_TTL = 3600
+
+@st.cache_data(show_spinner=False)
+def load_css():
+    """Read the app stylesheet."""
+    return CSS_PATH.read_text(encoding="utf-8")
+
+@st.cache_resource(show_spinner=False)
+def get_executor():
+    """
+    Return the process-wide thread pool for background work.
+
+    Globals in this script are reset on every rerun, so the pool is held by
+    Streamlit's resource cache and shared by all reruns and sessions.
+    """
+    return ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 4) * 4))
+
 def get_current_timestamp():
     """Get current timestamp in a readable format."""
     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
+def normalize_question(question):
+    """Normalize a question for answer caching (case and whitespace insensitive)."""
+    return " ".join(question.lower().split())
+
+def _iter_blocks(fileobj, block_size=SPOOL_BLOCK_SIZE):
+    """Yield a binary file-like object's content in fixed-size blocks, from the start."""
+    fileobj.seek(0)
+    return iter(lambda: fileobj.read(block_size), b"")
+
+def compute_corpus_hash(uploads):
+    """Compute a stable SHA-256 fingerprint over (filename, file-like) pairs."""
+    digest = hashlib.sha256()
+    for filename, fileobj in uploads:
+        name = filename.encode("utf-8")
+        digest.update(len(name).to_bytes(8, "big"))
+        digest.update(name)
+        for block in _iter_blocks(fileobj):
+            digest.update(block)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def spool_to_disk(fileobj, filename):
+    """Copy an upload to a temporary file in fixed-size blocks and return its path."""
+    fileobj.seek(0)
+    suffix = os.path.splitext(filename)[1]
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        shutil.copyfileobj(fileobj, tmp, length=SPOOL_BLOCK_SIZE)
+    return tmp.name
+
+def load_single_file(upload):
+    """Load a single (filename, file-like) pair into documents."""
+    filename, fileobj = upload
+    if filename == MANUAL_INPUT_SOURCE:
+        fileobj.seek(0)
+        return load_from_text(fileobj.read().decode("utf-8"), MANUAL_INPUT_SOURCE)
+
+    path = spool_to_disk(fileobj, filename)
+    try:
+        return load_documents(path, filename)
+    finally:
+        os.remove(path)
+
+def load_corpus(uploads, on_progress=None):
+    """Load (filename, file-like) pairs concurrently into documents and per-source information."""
+    all_docs = []
+    document_sources = {}
+
+    # Parsing is independent per file, so files are loaded in parallel.
+    # Progress is reported from this thread as each file finishes, while the
+    # corpus is assembled in upload order to keep it deterministic.
+    executor = get_executor()
+    futures = {executor.submit(load_single_file, upload): i for i, upload in enumerate(uploads)}
+    loaded = [None] * len(uploads)
+    for completed, future in enumerate(as_completed(futures), start=1):
+        i = futures[future]
+        loaded[i] = future.result()
+        if on_progress:
+            on_progress(10 + int((completed / len(uploads)) * 30), f"📄 Processed {uploads[i][0]}")
+
+    for docs in loaded:
+        all_docs.extend(docs)
+
+        # Store source information
+        for doc in docs:
+            if hasattr(doc, 'metadata') and 'source' in doc.metadata:
+                source_name = doc.metadata['source']
+                document_sources[source_name] = {
+                    'type': doc.metadata.get('type', 'unknown'),
+                    'chunks': len(docs)
+                }
+
+    return all_docs, document_sources
+
+def _save_to_cache(cache_path, payload):
+    """Atomically pickle a payload to the cache (tmp file + rename)."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        # Some vector store backends hold live clients that can't be pickled
+        print(f"Skipping vector store cache write: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def get_or_build_vector_store(uploads, on_progress=None, corpus_hash=None):
+    """
+    Returns the vector store for a corpus, reusing earlier work when possible.
+
+    Lookup order is the current session, then the store persisted under
+    ``CACHE_DIR/{hash}/`` (FAISS or ChromaDB) with its sources and chunks in
+    ``CACHE_DIR/{hash}.pkl``, and only on a miss are the documents loaded,
+    chunked and embedded. Fallback stores without native persistence are
+    pickled into the ``.pkl`` file instead.
+
+    Args:
+        uploads: A list of (filename, binary file-like) pairs.
+        on_progress: Optional callback taking (percent, message).
+        corpus_hash: Precomputed hash of ``uploads``, if already known.
+
+    Returns:
+        A tuple of (corpus_hash, vector_store, document_sources, chunks).
+    """
+    if corpus_hash is None:
+        corpus_hash = compute_corpus_hash(uploads)
+
+    # Reruns within the same session never touch disk. The sources come from
+    # corpus_sources, saved with the store, because the Process handler has
+    # already reset document_sources by the time it gets here
+    if (
+        st.session_state.get("corpus_hash") == corpus_hash
+        and st.session_state.get("vector_store") is not None
+    ):
+        return (
+            corpus_hash,
+            st.session_state.vector_store,
+            st.session_state.corpus_sources,
+            st.session_state.chunks,
+        )
+
+    cache_path = os.path.join(CACHE_DIR, f"{corpus_hash}.pkl")
+    store_dir = os.path.join(CACHE_DIR, corpus_hash)
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, "rb") as f:
+                vector_store, document_sources, chunks = pickle.load(f)
+            if vector_store is None:
+                vector_store = load_vector_store(store_dir)
+            if vector_store is not None:
+                return corpus_hash, vector_store, document_sources, chunks
+        except Exception as e:
+            print(f"Ignoring unreadable cache entry {cache_path}: {e}")
+
+    if on_progress:
+        on_progress(10, "📄 Loading uploaded files...")
+    all_docs, document_sources = load_corpus(uploads, on_progress)
+    if not all_docs:
+        raise ValueError("No valid documents found.")
+
+    # Chunk documents
+    if on_progress:
+        on_progress(60, "✂️ Chunking documents...")
+    chunks = chunk_data_parallel(all_docs)
+
+    # Create vector store
+    if on_progress:
+        on_progress(80, "🧠 Creating vector embeddings...")
+    shutil.rmtree(store_dir, ignore_errors=True)
+    vector_store = create_vector_store(chunks, persist_directory=store_dir)
+
+    # Natively persisted stores are reopened from store_dir, not unpickled
+    persisted = os.path.isdir(store_dir)
+    _save_to_cache(cache_path, (None if persisted else vector_store, document_sources, chunks))
+    return corpus_hash, vector_store, document_sources, chunks
+
+@st.cache_resource(show_spinner=False, max_entries=CHAIN_CACHE_MAX_ENTRIES, ttl=CHAIN_CACHE_TTL)
+def _build_chain(corpus_hash, _vector_store):
+    """
+    Builds (or reuses) the retriever and RAG chain for a corpus.
+
+    Streamlit keys the cache on ``corpus_hash`` only; ``_vector_store`` is not
+    hashed, so the same corpus shares one chain across reruns and sessions.
+    At most ``CHAIN_CACHE_MAX_ENTRIES`` corpora are held, each for up to
+    ``CHAIN_CACHE_TTL`` seconds, so past uploads don't pin their stores in
+    server memory for the life of the process.
+    This function must not touch Streamlit elements: cache hits replay them,
+    and elements created by the caller don't exist in a later run.
+
+    Returns:
+        A tuple of (vector_store, retriever, rag_chain, answer_cache), where
+        ``vector_store`` is the store the cached chain retrieves from and
+        ``answer_cache`` holds answers keyed on normalized questions.
+    """
+    retriever = create_retriever(_vector_store)
+    rag_chain = create_rag_chain(retriever)
+
+    answer_cache = AnswerCache(maxsize=ANSWER_CACHE_SIZE)
+
+    return _vector_store, retriever, rag_chain, answer_cache
+
+def set_document_sources(document_sources):
+    """Store document sources along with their totals, computed once at ingest."""
+    st.session_state.document_sources = document_sources
+    st.session_state.n_docs = len(document_sources)
+    st.session_state.total_chunks = sum(info['chunks'] for info in document_sources.values())
+
+def get_embedding_model(vector_store):
+    """Return the embedding model backing a vector store, whichever backend it is."""
+    if hasattr(vector_store, "embedding_model"):
+        return vector_store.embedding_model
+    return vector_store.embeddings
+
+def format_sources_html(sources):
+    """Format source names as a small attribution line."""
+    if not sources:
+        return ""
+    sources = [html.escape(source) for source in sources]
+    if len(sources) == 1:
+        return f"<br><small style='color: #cbd5e1; font-style: italic;'>📄 Source: {sources[0]}</small>"
+    return f"<br><small style='color: #cbd5e1; font-style: italic;'>📄 Sources: {', '.join(sources)}</small>"
+
+def display_answer(answer, sources):
+    """Display an answer with source attribution."""
+    st.markdown(f"""
+    <div class="answer-container">
+        <h4>💡 AI Intelligence Response:</h4>
+        <div class="answer-content">{html.escape(str(answer))}</div>
+        {format_sources_html(sources)}
+    </div>
+    """, unsafe_allow_html=True)
+
+def render_history_item(number, chat_item):
+    """Render one conversation turn (question and answer) as HTML."""
+    # Newlines in the answer become <br> so the stored snippet never contains
+    # a blank line (see HISTORY_ITEM_HTML)
+    return HISTORY_ITEM_HTML.format(
+        number=number,
+        question=html.escape(chat_item['question']),
+        answer=html.escape(chat_item['answer']).replace("\n", "<br>"),
+        sources=format_sources_html(chat_item.get('sources'))
+    )
+
+def add_to_history(question, answer, sources):
+    """Store a question and its answer in the chat history, with its rendered HTML."""
+    chat_item = {
+        "question": question,
+        "answer": str(answer),
+        "sources": sources,
+        "timestamp": get_current_timestamp()
+    }
+    st.session_state.chat_history.append(chat_item)
+    st.session_state.history_html.append(
+        render_history_item(len(st.session_state.chat_history), chat_item)
+    )
+
+def clear_history():
+    """Clear the chat history and its rendered HTML."""
+    st.session_state.chat_history = []
+    st.session_state.history_html = []
+
+async def _answer_all(rag_chain, questions):
+    """Run the RAG chain on several questions concurrently."""
+    return await asyncio.gather(*(rag_chain.ainvoke(q) for q in questions))
+
+def stream_answer(question):
+    """Stream the RAG chain's answer into the page token by token and return it."""
+    placeholder = st.empty()
+    with placeholder.container():
+        # st.write_stream appends tokens as they arrive instead of re-rendering the whole answer
+        answer = st.write_stream(st.session_state.rag_chain.stream(question))
+    # The final answer is rendered with its sources by the caller
+    placeholder.empty()
+    return answer
+
 def process_question(question):
-    """Process a single question using the RAG chain."""
+    """Process a single question using the RAG chain; returns True once it is answered."""
     with st.spinner("🧠 Activating AI Intelligence..."):
         try:
-            # Get answer from RAG chain
-            answer = st.session_state.rag_chain.invoke(question)
-            
-            # Extract source information from the answer
-            sources = []
-            if hasattr(answer, 'metadata') and 'sources' in answer.metadata:
-                sources = answer.metadata['sources']
-            elif hasattr(answer, 'source_documents'):
-                # Extract unique source names from source documents
-                for doc in answer.source_documents:
-                    if hasattr(doc, 'metadata') and 'source' in doc.metadata:
-                        source_name = doc.metadata['source']
-                        if source_name not in sources:
-                            sources.append(source_name)
-            
-            # If no sources found, use document sources as fallback
-            if not sources and st.session_state.document_sources:
-                sources = list(st.session_state.document_sources.keys())
+            # The normalized form is only a cache key; retrieval and the LLM
+            # see the question exactly as the user typed it
+            q_norm = normalize_question(question)
             
-            # Format source text for display
-            sources_text = ""
-            if sources:
-                if len(sources) == 1:
-                    sources_text = f"<br><small style='color: #cbd5e1; font-style: italic;'>📄 Source: {sources[0]}</small>"
-                else:
-                    sources_text = f"<br><small style='color: #cbd5e1; font-style: italic;'>📄 Sources: {', '.join(sources)}</small>"
+            # Paraphrases of an earlier question reuse its answer
+            embedding_model = get_embedding_model(st.session_state.vector_store)
+            q_emb = embedding_model.embed_query(question)
+            cached = st.session_state.qa_cache.lookup(q_emb)
             
-            # Display answer with source attribution
-            st.markdown(f"""
-            <div class="answer-container">
-                <h4>💡 AI Intelligence Response:</h4>
-                <div class="answer-content">{answer}</div>
-                {sources_text}
-            </div>
-            """, unsafe_allow_html=True)
+            if cached is not None:
+                answer, sources = cached
+            else:
+                # Get answer from RAG chain, reusing answers to repeated questions
+                answer = st.session_state.answer_cache.get(q_norm)
+                if answer is None:
+                    answer = stream_answer(question)
+                    st.session_state.answer_cache.put(q_norm, answer)
+                
+                # Extract source information from the answer
+                sources = []
+                if hasattr(answer, 'metadata') and 'sources' in answer.metadata:
+                    sources = answer.metadata['sources']
+                elif hasattr(answer, 'source_documents'):
+                    # Extract unique source names from source documents, in order
+                    sources = list(dict.fromkeys(
+                        source
+                        for source in (getattr(doc, 'metadata', {}).get('source') for doc in answer.source_documents)
+                        if source is not None
+                    ))
+                
+                # If no sources found, use document sources as fallback
+                if not sources and st.session_state.document_sources:
+                    sources = list(st.session_state.document_sources.keys())
+                
+                st.session_state.qa_cache.add(q_emb, answer, sources)
             
-            # Store in chat history
-            chat_item = {
-                "question": question,
-                "answer": str(answer),
-                "sources": sources,
-                "timestamp": get_current_timestamp()
-            }
-            st.session_state.chat_history.append(chat_item)
+            display_answer(answer, sources)
+            add_to_history(question, answer, sources)
             
             # Show success message
             st.success("✅ Insight discovered and added to conversation memory!")
             
-            # Clear the question input by refreshing the page
-            st.rerun()
+            # Give the question input a fresh key so it renders empty on the
+            # next interaction, without re-running the whole script now
+            st.session_state.q_key_nonce += 1
+            return True
             
         except Exception as e:
             st.error(f"Error generating answer: {str(e)}")
             # Reset the last question to allow retry
-            st.session_state.last_question = ""
+            st.session_state.last_question_id = None
+            return False
+
+def process_questions(questions):
+    """Answer several questions at once, running uncached ones concurrently; returns True on success."""
+    with st.spinner(f"🧠 Answering {len(questions)} questions..."):
+        try:
+            q_norms = [normalize_question(q) for q in questions]
+            answers = {q_norm: st.session_state.answer_cache.get(q_norm) for q_norm in q_norms}
+            # First original wording of each normalized question, sent to the chain
+            originals = {}
+            for question, q_norm in zip(questions, q_norms):
+                originals.setdefault(q_norm, question)
+            
+            pending = [q_norm for q_norm, answer in answers.items() if answer is None]
+            if pending:
+                results = asyncio.run(_answer_all(st.session_state.rag_chain, [originals[q] for q in pending]))
+                for q_norm, answer in zip(pending, results):
+                    st.session_state.answer_cache.put(q_norm, answer)
+                    answers[q_norm] = answer
+            
+            sources = list(st.session_state.document_sources.keys())
+            for question, q_norm in zip(questions, q_norms):
+                display_answer(answers[q_norm], sources)
+                add_to_history(question, answers[q_norm], sources)
+            
+            st.success(f"✅ {len(questions)} insights discovered and added to conversation memory!")
+            st.session_state.q_key_nonce += 1
+            return True
+            
+        except Exception as e:
+            st.error(f"Error generating answers: {str(e)}")
+            return False
 
 # Initialize session state
 if "documents" not in st.session_state:
@@ -93,797 +431,49 @@ if "retriever" not in st.session_state:
     st.session_state.retriever = None
 if "rag_chain" not in st.session_state:
     st.session_state.rag_chain = False
+if "answer_cache" not in st.session_state:
+    st.session_state.answer_cache = None
+if "qa_cache" not in st.session_state:
+    st.session_state.qa_cache = SemanticCache()
+if "q_key_nonce" not in st.session_state:
+    st.session_state.q_key_nonce = 0
+if "last_question_id" not in st.session_state:
+    st.session_state.last_question_id = None
+if "pending_q" not in st.session_state:
+    st.session_state.pending_q = None
 if "processed" not in st.session_state:
     st.session_state.processed = False
 if "chat_history" not in st.session_state:
-    st.session_state.chat_history = []
+    clear_history()
 if "document_sources" not in st.session_state:
-    st.session_state.document_sources = {}
+    set_document_sources({})
 if "vector_store" not in st.session_state:
     st.session_state.vector_store = None
+if "corpus_hash" not in st.session_state:
+    st.session_state.corpus_hash = None
+if "corpus_sources" not in st.session_state:
+    st.session_state.corpus_sources = {}
+if "chunks" not in st.session_state:
+    st.session_state.chunks = []
 if "current_time" not in st.session_state:
     st.session_state.current_time = get_current_timestamp()
 
-# Custom CSS for premium enterprise-grade design
-st.markdown("""
-<style>
-    /* Import Google Fonts for premium typography */
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700;800&family=JetBrains+Mono:wght@400;500&display=swap');
-    
-    /* CSS Variables for consistent theming */
-    :root {
-        --primary-gradient: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        --secondary-gradient: linear-gradient(135deg, #f093fb 0%, #f5576c 100%);
-        --accent-gradient: linear-gradient(135deg, #4facfe 0%, #00f2fe 100%);
-        --success-gradient: linear-gradient(135deg, #43e97b 0%, #38f9d7 100%);
-        --warning-gradient: linear-gradient(135deg, #fa709a 0%, #fee140 100%);
-        --error-gradient: linear-gradient(135deg, #ff9a9e 0%, #fecfef 100%);
-        --glass-bg: rgba(255, 255, 255, 0.1);
-        --glass-border: rgba(255, 255, 255, 0.2);
-        --shadow-light: 0 8px 32px rgba(31, 38, 135, 0.37);
-        --shadow-medium: 0 12px 40px rgba(31, 38, 135, 0.45);
-        --shadow-heavy: 0 20px 60px rgba(31, 38, 135, 0.55);
-    }
-    
-    /* Hide Streamlit default elements */
-    #MainMenu {visibility: hidden;}
-    footer {visibility: hidden;}
-    header {visibility: hidden;}
-    section[data-testid="stSidebar"] {display: none !important;}
-    .css-1d391kg {display: none !important;}
-    .css-1lcbmhc {display: none !important;}
-    
-    /* Global styles with premium typography */
-    * {
-        font-family: 'Inter', -apple-system, BlinkMacSystemFont, sans-serif;
-        box-sizing: border-box;
-    }
-    
-    body, .main, .stApp {
-        background: linear-gradient(135deg, #0f0f23 0%, #1a1a2e 25%, #16213e 50%, #0f3460 75%, #533483 100%);
-        color: #ffffff;
-        min-height: 100vh;
-        overflow-x: hidden;
-    }
-    
-    /* Premium scrollbar */
-    ::-webkit-scrollbar {
-        width: 8px;
-    }
-    
-    ::-webkit-scrollbar-track {
-        background: rgba(255, 255, 255, 0.1);
-        border-radius: 10px;
-    }
-    
-    ::-webkit-scrollbar-thumb {
-        background: linear-gradient(180deg, #667eea, #764ba2);
-        border-radius: 10px;
-    }
-    
-    ::-webkit-scrollbar-thumb:hover {
-        background: linear-gradient(180deg, #764ba2, #667eea);
-    }
-    
-    /* Premium header with glassmorphism */
-    .main-header {
-        background: var(--glass-bg);
-        backdrop-filter: blur(20px);
-        -webkit-backdrop-filter: blur(20px);
-        border: 1px solid var(--glass-border);
-        border-radius: 30px;
-        padding: 4rem 3rem;
-        margin: 3rem auto;
-        text-align: center;
-        box-shadow: var(--shadow-medium);
-        position: relative;
-        overflow: hidden;
-        max-width: 1200px;
-        animation: slideInDown 1s ease-out;
-    }
-    
-    .main-header::before {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: 0;
-        right: 0;
-        bottom: 0;
-        background: linear-gradient(45deg, rgba(102, 126, 234, 0.1) 0%, rgba(118, 75, 162, 0.1) 100%);
-        z-index: 1;
-    }
-    
-    .main-header::after {
-        content: '';
-        position: absolute;
-        top: -50%;
-        left: -50%;
-        width: 200%;
-        height: 200%;
-        background: radial-gradient(circle, rgba(102, 126, 234, 0.1) 0%, transparent 70%);
-        animation: rotate 20s linear infinite;
-        z-index: 0;
-    }
-    
-    .main-header h1, .main-header h3, .main-header p {
-        position: relative;
-        z-index: 2;
-    }
-    
-    .main-header h1 {
-        font-size: 4rem;
-        font-weight: 800;
-        margin-bottom: 1rem;
-        background: var(--primary-gradient);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        background-clip: text;
-        text-shadow: 0 0 30px rgba(102, 126, 234, 0.5);
-        animation: glow 2s ease-in-out infinite alternate;
-    }
-    
-    .main-header h3 {
-        font-size: 1.8rem;
-        font-weight: 500;
-        margin-bottom: 1.5rem;
-        color: #e2e8f0;
-        opacity: 0.9;
-    }
-    
-    .main-header p {
-        font-size: 1.2rem;
-        color: #cbd5e1;
-        max-width: 700px;
-        margin: 0 auto;
-        line-height: 1.6;
-    }
-    
-    /* Premium welcome section */
-    .welcome-section {
-        background: var(--glass-bg);
-        backdrop-filter: blur(20px);
-        -webkit-backdrop-filter: blur(20px);
-        border: 1px solid var(--glass-border);
-        border-radius: 25px;
-        padding: 4rem 3rem;
-        margin: 3rem auto;
-        text-align: center;
-        box-shadow: var(--shadow-medium);
-        max-width: 1000px;
-        animation: slideInUp 1s ease-out 0.2s both;
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .welcome-section::before {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: 0;
-        right: 0;
-        height: 3px;
-        background: var(--primary-gradient);
-        animation: slideInLeft 1.5s ease-out 0.5s both;
-    }
-    
-    .welcome-section h2 {
-        font-size: 3rem;
-        font-weight: 700;
-        margin-bottom: 1.5rem;
-        background: var(--primary-gradient);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        background-clip: text;
-    }
-    
-    .welcome-section p {
-        font-size: 1.3rem;
-        color: #e2e8f0;
-        margin-bottom: 2rem;
-        max-width: 700px;
-        margin-left: auto;
-        margin-right: auto;
-        line-height: 1.7;
-    }
-    
-    /* Premium feature cards with hover effects */
-    .features-grid {
-        display: grid;
-        grid-template-columns: repeat(auto-fit, minmax(280px, 1fr));
-        gap: 2rem;
-        margin: 3rem auto;
-        max-width: 1200px;
-        animation: slideInUp 1s ease-out 0.4s both;
-    }
-    
-    .feature-card {
-        background: var(--glass-bg);
-        backdrop-filter: blur(20px);
-        -webkit-backdrop-filter: blur(20px);
-        border: 1px solid var(--glass-border);
-        border-radius: 20px;
-        padding: 3rem 2rem;
-        text-align: center;
-        box-shadow: var(--shadow-light);
-        transition: all 0.4s cubic-bezier(0.4, 0, 0.2, 1);
-        position: relative;
-        overflow: hidden;
-        cursor: pointer;
-    }
-    
-    .feature-card::before {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: -100%;
-        width: 100%;
-        height: 100%;
-        background: linear-gradient(90deg, transparent, rgba(255, 255, 255, 0.1), transparent);
-        transition: left 0.6s;
-    }
-    
-    .feature-card:hover::before {
-        left: 100%;
-    }
-    
-    .feature-card:hover {
-        transform: translateY(-10px) scale(1.02);
-        box-shadow: var(--shadow-heavy);
-        border-color: rgba(102, 126, 234, 0.5);
-    }
-    
-    .feature-card h4 {
-        font-size: 1.5rem;
-        font-weight: 600;
-        margin-bottom: 1.5rem;
-        color: #ffffff;
-        position: relative;
-        z-index: 1;
-    }
-    
-    .feature-card p {
-        color: #cbd5e1;
-        font-size: 1.1rem;
-        line-height: 1.6;
-        margin: 0;
-        position: relative;
-        z-index: 1;
-    }
-    
-    /* Premium upload section */
-    .upload-section {
-        background: var(--glass-bg);
-        backdrop-filter: blur(20px);
-        -webkit-backdrop-filter: blur(20px);
-        border: 1px solid var(--glass-border);
-        border-radius: 25px;
-        padding: 4rem 3rem;
-        margin: 3rem auto;
-        text-align: center;
-        box-shadow: var(--shadow-medium);
-        max-width: 900px;
-        animation: slideInUp 1s ease-out 0.6s both;
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .upload-section::after {
-        content: '';
-        position: absolute;
-        bottom: 0;
-        left: 0;
-        right: 0;
-        height: 3px;
-        background: var(--secondary-gradient);
-        animation: slideInRight 1.5s ease-out 0.7s both;
-    }
-    
-    .upload-section h2 {
-        font-size: 2.5rem;
-        font-weight: 700;
-        margin-bottom: 1.5rem;
-        background: var(--secondary-gradient);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        background-clip: text;
-    }
-    
-    .upload-section p {
-        font-size: 1.2rem;
-        color: #cbd5e1;
-        margin-bottom: 3rem;
-        line-height: 1.6;
-    }
-    
-    /* Premium file uploader */
-    .stFileUploader > div > div {
-        border: 2px dashed rgba(102, 126, 234, 0.5);
-        border-radius: 20px;
-        background: rgba(255, 255, 255, 0.05);
-        transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1);
-        color: #ffffff !important;
-        backdrop-filter: blur(10px);
-        -webkit-backdrop-filter: blur(10px);
-    }
-    
-    .stFileUploader > div > div:hover {
-        border-color: #667eea;
-        background: rgba(102, 126, 234, 0.1);
-        transform: translateY(-2px);
-        box-shadow: 0 10px 30px rgba(102, 126, 234, 0.3);
-    }
-    
-    .stFileUploader > div > div > button {
-        background: var(--primary-gradient) !important;
-        color: white !important;
-        border: none !important;
-        border-radius: 12px !important;
-        padding: 0.75rem 1.5rem !important;
-        font-weight: 600 !important;
-        transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1) !important;
-        box-shadow: 0 4px 15px rgba(102, 126, 234, 0.4) !important;
-    }
-    
-    .stFileUploader > div > div > button:hover {
-        transform: translateY(-2px) !important;
-        box-shadow: 0 8px 25px rgba(102, 126, 234, 0.6) !important;
-    }
-    
-    /* Premium text area */
-    .stTextArea > div > div > textarea {
-        border: 2px solid rgba(102, 126, 234, 0.3);
-        border-radius: 15px;
-        background: rgba(255, 255, 255, 0.05);
-        transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1);
-        font-size: 1rem;
-        padding: 1.5rem;
-        color: #ffffff !important;
-        font-weight: 500;
-        backdrop-filter: blur(10px);
-        -webkit-backdrop-filter: blur(10px);
-    }
-    
-    .stTextArea > div > div > textarea:focus {
-        border-color: #667eea;
-        background: rgba(255, 255, 255, 0.1);
-        box-shadow: 0 0 0 4px rgba(102, 126, 234, 0.2);
-        outline: none;
-        transform: translateY(-1px);
-    }
-    
-    .stTextArea > div > div > textarea::placeholder {
-        color: rgba(203, 213, 225, 0.7) !important;
-    }
-    
-    /* Premium buttons */
-    .stButton > button {
-        background: var(--primary-gradient);
-        color: white;
-        border: none;
-        border-radius: 15px;
-        padding: 1rem 2.5rem;
-        font-weight: 600;
-        font-size: 1.1rem;
-        transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1);
-        box-shadow: 0 6px 20px rgba(102, 126, 234, 0.4);
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .stButton > button::before {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: -100%;
-        width: 100%;
-        height: 100%;
-        background: linear-gradient(90deg, transparent, rgba(255, 255, 255, 0.2), transparent);
-        transition: left 0.6s;
-    }
-    
-    .stButton > button:hover::before {
-        left: 100%;
-    }
-    
-    .stButton > button:hover {
-        transform: translateY(-3px);
-        box-shadow: 0 10px 30px rgba(102, 126, 234, 0.6);
-    }
-    
-    .stButton > button:active {
-        transform: translateY(-1px);
-    }
-    
-    /* Premium chat container */
-    .chat-container {
-        background: var(--glass-bg);
-        backdrop-filter: blur(20px);
-        -webkit-backdrop-filter: blur(20px);
-        border: 1px solid var(--glass-border);
-        border-radius: 25px;
-        padding: 3rem;
-        margin: 3rem auto;
-        box-shadow: var(--shadow-medium);
-        max-width: 1000px;
-        animation: slideInUp 1s ease-out 0.8s both;
-    }
-    
-    .chat-header {
-        text-align: center;
-        margin-bottom: 3rem;
-        padding-bottom: 2rem;
-        border-bottom: 2px solid rgba(102, 126, 234, 0.3);
-        position: relative;
-    }
-    
-    .chat-header::after {
-        content: '';
-        position: absolute;
-        bottom: -2px;
-        left: 50%;
-        transform: translateX(-50%);
-        width: 100px;
-        height: 2px;
-        background: var(--primary-gradient);
-        border-radius: 1px;
-    }
-    
-    .chat-header h2 {
-        font-size: 2.5rem;
-        font-weight: 700;
-        margin-bottom: 1rem;
-        background: var(--primary-gradient);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        background-clip: text;
-    }
-    
-    .chat-header p {
-        font-size: 1.2rem;
-        color: #cbd5e1;
-        margin: 0;
-        line-height: 1.6;
-    }
-    
-    /* Premium question input */
-    .stTextInput > div > div > input {
-        border: 2px solid rgba(102, 126, 234, 0.3);
-        border-radius: 15px;
-        background: rgba(255, 255, 255, 0.05);
-        transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1);
-        color: #ffffff !important;
-        font-size: 1.1rem;
-        padding: 1rem 1.5rem;
-        backdrop-filter: blur(10px);
-        -webkit-backdrop-filter: blur(10px);
-    }
-    
-    .stTextInput > div > div > input:focus {
-        border-color: #667eea;
-        background: rgba(255, 255, 255, 0.1);
-        box-shadow: 0 0 0 4px rgba(102, 126, 234, 0.2);
-        transform: translateY(-1px);
-    }
-    
-    .stTextInput > div > div > input::placeholder {
-        color: rgba(203, 213, 225, 0.7) !important;
-    }
-    
-    /* Premium answer display */
-    .answer-container {
-        background: var(--glass-bg);
-        backdrop-filter: blur(20px);
-        -webkit-backdrop-filter: blur(20px);
-        border: 1px solid var(--glass-border);
-        border-radius: 20px;
-        padding: 2.5rem;
-        margin: 2rem 0;
-        border-left: 5px solid #667eea;
-        box-shadow: var(--shadow-light);
-        position: relative;
-        animation: slideInRight 0.6s ease-out;
-    }
-    
-    .answer-container::before {
-        content: '💡';
-        position: absolute;
-        top: -15px;
-        left: 25px;
-        background: var(--glass-bg);
-        backdrop-filter: blur(20px);
-        -webkit-backdrop-filter: blur(20px);
-        padding: 8px 15px;
-        border-radius: 25px;
-        font-size: 1.3rem;
-        box-shadow: var(--shadow-light);
-        border: 1px solid var(--glass-border);
-    }
-    
-    .answer-content {
-        margin-top: 1.5rem;
-        line-height: 1.7;
-        color: #ffffff;
-        font-size: 1.1rem;
-    }
-    
-    /* Premium status indicators */
-    .status-container {
-        display: grid;
-        grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-        gap: 2rem;
-        margin: 3rem auto;
-        max-width: 1000px;
-        animation: slideInUp 1s ease-out 1s both;
-    }
-    
-    .status-card {
-        background: var(--glass-bg);
-        backdrop-filter: blur(20px);
-        -webkit-backdrop-filter: blur(20px);
-        border: 1px solid var(--glass-border);
-        border-radius: 20px;
-        padding: 2rem;
-        text-align: center;
-        box-shadow: var(--shadow-light);
-        border-top: 4px solid;
-        border-image: var(--primary-gradient) 1;
-        transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1);
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .status-card::before {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: 0;
-        right: 0;
-        bottom: 0;
-        background: linear-gradient(45deg, rgba(102, 126, 234, 0.1) 0%, rgba(118, 75, 162, 0.1) 100%);
-        opacity: 0;
-        transition: opacity 0.3s;
-    }
-    
-    .status-card:hover::before {
-        opacity: 1;
-    }
-    
-    .status-card:hover {
-        transform: translateY(-5px);
-        box-shadow: var(--shadow-medium);
-    }
-    
-    .status-card h3 {
-        color: #cbd5e1;
-        font-size: 1rem;
-        font-weight: 500;
-        margin: 0 0 1rem 0;
-        text-transform: uppercase;
-        letter-spacing: 1px;
-        position: relative;
-        z-index: 1;
-    }
-    
-    .status-card .value {
-        color: #ffffff;
-        font-size: 2.5rem;
-        font-weight: 800;
-        margin: 0;
-        background: var(--primary-gradient);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        background-clip: text;
-        position: relative;
-        z-index: 1;
-    }
-    
-    /* Premium success/error messages */
-    .stSuccess {
-        background: var(--success-gradient);
-        color: white;
-        border-radius: 15px;
-        padding: 1.5rem 2rem;
-        border: none;
-        box-shadow: var(--shadow-medium);
-        margin: 2rem auto;
-        max-width: 900px;
-        font-weight: 600;
-        animation: slideInDown 0.6s ease-out;
-    }
-    
-    .stError {
-        background: var(--error-gradient);
-        color: white;
-        border-radius: 15px;
-        padding: 1.5rem 2rem;
-        border: none;
-        box-shadow: var(--shadow-medium);
-        margin: 2rem auto;
-        max-width: 900px;
-        font-weight: 600;
-        animation: slideInDown 0.6s ease-out;
-    }
-    
-    .stWarning {
-        background: var(--warning-gradient);
-        color: white;
-        border-radius: 15px;
-        padding: 1.5rem 2rem;
-        border: none;
-        box-shadow: var(--shadow-medium);
-        margin: 2rem auto;
-        max-width: 900px;
-        font-weight: 600;
-        animation: slideInDown 0.6s ease-out;
-    }
-    
-    /* Premium animations */
-    @keyframes slideInDown {
-        from {
-            opacity: 0;
-            transform: translateY(-50px);
-        }
-        to {
-            opacity: 1;
-            transform: translateY(0);
-        }
-    }
-    
-    @keyframes slideInUp {
-        from {
-            opacity: 0;
-            transform: translateY(50px);
-        }
-        to {
-            opacity: 1;
-            transform: translateY(0);
-        }
-    }
-    
-    @keyframes slideInLeft {
-        from {
-            opacity: 0;
-            transform: translateX(-50px);
-        }
-        to {
-            opacity: 1;
-            transform: translateX(0);
-        }
-    }
-    
-    @keyframes slideInRight {
-        from {
-            opacity: 0;
-            transform: translateX(50px);
-        }
-        to {
-            opacity: 1;
-            transform: translateX(0);
-        }
-    }
-    
-    @keyframes glow {
-        from {
-            text-shadow: 0 0 30px rgba(102, 126, 234, 0.5);
-        }
-        to {
-            text-shadow: 0 0 50px rgba(102, 126, 234, 0.8);
-        }
-    }
-    
-    @keyframes rotate {
-        from {
-            transform: rotate(0deg);
-        }
-        to {
-            transform: rotate(360deg);
-        }
-    }
-    
-    /* Premium responsive design */
-    @media (max-width: 768px) {
-        .main-header h1 {
-            font-size: 2.5rem;
-        }
-        
-        .main-header h3 {
-            font-size: 1.4rem;
-        }
-        
-        .chat-container, .upload-section, .welcome-section {
-            margin: 1.5rem;
-            padding: 2rem;
-        }
-        
-        .status-container {
-            grid-template-columns: 1fr;
-            gap: 1.5rem;
-        }
-        
-        .features-grid {
-            grid-template-columns: 1fr;
-            gap: 1.5rem;
-        }
-        
-        .main-header, .welcome-section, .upload-section {
-            padding: 2rem 1.5rem;
-        }
-    }
-    
-    /* Premium loading animations */
-    .stSpinner > div {
-        background: var(--primary-gradient) !important;
-        border-radius: 50% !important;
-        animation: pulse 1.5s ease-in-out infinite !important;
-    }
-    
-    @keyframes pulse {
-        0%, 100% {
-            opacity: 1;
-            transform: scale(1);
-        }
-        50% {
-            opacity: 0.5;
-            transform: scale(1.1);
-        }
-    }
-    
-    /* Premium focus states */
-    .stTextInput > div > div > input:focus,
-    .stTextArea > div > div > textarea:focus {
-        outline: none;
-        border-color: #667eea;
-        box-shadow: 0 0 0 4px rgba(102, 126, 234, 0.2);
-    }
-    
-    /* Premium hover effects for all interactive elements */
-    .stButton > button:hover,
-    .stFileUploader > div > div:hover,
-    .stTextInput > div > div > input:hover,
-    .stTextArea > div > div > textarea:hover {
-        transform: translateY(-2px);
-        transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1);
-    }
-</style>
-""", unsafe_allow_html=True)
+# Custom CSS for premium enterprise-grade design. The stylesheet is read
+# from disk once per process; it is still emitted on every run because
+# Streamlit drops elements that a rerun does not re-create.
+st.markdown(f"<style>{load_css()}</style>", unsafe_allow_html=True)
 
 def display_chat_history():
     """Display the conversation history with source attribution."""
     if st.session_state.chat_history:
-        st.markdown("""
-        <div class="chat-container">
-            <div class="chat-header">
-                <h2>📚 Conversation History</h2>
-                <p>Your previous questions and AI responses</p>
-            </div>
-        """, unsafe_allow_html=True)
-        
-        for i, chat_item in enumerate(st.session_state.chat_history):
-            # Question
-            st.markdown(f"""
-            <div style="background: rgba(102, 126, 234, 0.1); border-radius: 15px; padding: 1.5rem; margin: 1rem 0; border-left: 4px solid #667eea;">
-                <div style="font-weight: 600; color: #667eea; margin-bottom: 0.5rem;">🤔 Question {i+1}:</div>
-                <div style="color: #ffffff;">{chat_item['question']}</div>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            # Answer with source attribution
-            sources_text = ""
-            if chat_item.get('sources'):
-                if len(chat_item['sources']) == 1:
-                    sources_text = f"<br><small style='color: #cbd5e1; font-style: italic;'>📄 Source: {chat_item['sources'][0]}</small>"
-                else:
-                    sources_text = f"<br><small style='color: #cbd5e1; font-style: italic;'>📄 Sources: {', '.join(chat_item['sources'])}</small>"
-            
-            st.markdown(f"""
-            <div class="answer-container">
-                <h4>💡 Answer:</h4>
-                <div class="answer-content">{chat_item['answer']}</div>
-                {sources_text}
-            </div>
-            """, unsafe_allow_html=True)
-        
-        st.markdown("</div>", unsafe_allow_html=True)
+        # Each turn's HTML was rendered once when it was added, so this is a
+        # single join and a single element regardless of history length.
+        # Every piece is stored flush-left, so single newlines keep the
+        # whole history one Markdown HTML block
+        st.markdown(
+            "\n".join([HISTORY_HEADER_HTML, *st.session_state.history_html, HISTORY_FOOTER_HTML]),
+            unsafe_allow_html=True
+        )
 
 # Main header
 st.markdown("""
@@ -894,8 +484,14 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-# Main content area
-if st.session_state.processed:
+@st.fragment
+def qa_panel():
+    """
+    Status cards, conversation history and the Q&A input.
+
+    Running as a fragment, interactions here rerun only this panel, not the
+    stylesheet, header or the rest of the page.
+    """
     # Document summary with enhanced information
     st.markdown("""
     <div class="status-container">
@@ -917,8 +513,8 @@ if st.session_state.processed:
         </div>
     </div>
     """.format(
-        len(st.session_state.document_sources), 
-        sum(info['chunks'] for info in st.session_state.document_sources.values()),
+        st.session_state.n_docs, 
+        st.session_state.total_chunks,
         len(st.session_state.chat_history)
     ), unsafe_allow_html=True)
     
@@ -939,34 +535,54 @@ if st.session_state.processed:
     if st.session_state.document_sources:
         st.info(f"""
         **📚 Current Document Context:**
-        - **Active documents**: {len(st.session_state.document_sources)}
+        - **Active documents**: {st.session_state.n_docs}
         - **Document sources**: {', '.join(st.session_state.document_sources.keys())}
-        - **Total chunks**: {sum(info['chunks'] for info in st.session_state.document_sources.values())}
+        - **Total chunks**: {st.session_state.total_chunks}
         """)
     
     # Simple question input without form
     question = st.text_input(
         "What would you like to discover?",
         placeholder="Ask any question about your documents to unlock insights...",
-        key=f"question_input_{len(st.session_state.chat_history)}"
+        key=f"question_input_{st.session_state.q_key_nonce}"
     )
+    question_id = (st.session_state.q_key_nonce, question)
     
-    # Process question when Enter is pressed or button is clicked
+    # Both Enter and the button only mark the question as pending; a single
+    # dispatch below processes it at most once
     col1, col2 = st.columns([3, 1])
     with col1:
-        if st.button("🔍 Discover Insights", use_container_width=True):
-            if question and question.strip():
-                process_question(question)
+        if st.button("🔍 Discover Insights", use_container_width=True) and question and question.strip():
+            st.session_state.pending_q = question_id
     with col2:
         if st.button("🗑️ Clear", use_container_width=True):
-            # Use rerun to clear the input instead of modifying session state
-            st.rerun()
+            # A fresh key renders the question input empty
+            st.session_state.q_key_nonce += 1
+            st.rerun(scope="fragment")
     
-    # Process question when Enter is pressed
+    # Enter submits the text input, which reruns with its value set
     if question and question.strip():
-        if "last_question" not in st.session_state or st.session_state.last_question != question:
-            st.session_state.last_question = question
-            process_question(question)
+        st.session_state.pending_q = question_id
+    
+    pending_q = st.session_state.pending_q
+    if pending_q and pending_q != st.session_state.last_question_id:
+        st.session_state.last_question_id = pending_q
+        if process_question(pending_q[1]):
+            # The status cards and history above were drawn before this
+            # answer; redraw the panel so they include it
+            st.rerun(scope="fragment")
+    
+    # Batch mode: several questions answered concurrently
+    with st.expander("📋 Ask multiple questions"):
+        batch_text = st.text_area(
+            "One question per line:",
+            placeholder="What are the key findings?\nWhat risks are mentioned?",
+            key=f"batch_input_{st.session_state.q_key_nonce}"
+        )
+        if st.button("🔍 Answer All", use_container_width=True):
+            questions = [q.strip() for q in batch_text.splitlines() if q.strip()]
+            if questions and process_questions(questions):
+                st.rerun(scope="fragment")
     
     st.markdown("</div>", unsafe_allow_html=True)
     
@@ -976,79 +592,26 @@ if st.session_state.processed:
         col1, col2, col3 = st.columns([1, 1, 1])
         with col2:
             if st.button("🗑️ Clear Chat History", use_container_width=True, type="secondary"):
-                st.session_state.chat_history = []
+                clear_history()
                 st.success("Chat history cleared!")
-                st.rerun()
+                st.rerun(scope="fragment")
+
+# Main content area
+if st.session_state.processed:
+    qa_panel()
 
 else:
     # Welcome message - MOVED TO TOP
-    st.markdown("""
-    <div class="welcome-section">
-        <h2>Stop Searching, Start Discovering</h2>
-        <p>Transform hours of document hunting into seconds of insight. Our enterprise-grade AI understands your content, remembers your conversations, and delivers precise answers that drive better decisions.</p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(WELCOME_HTML, unsafe_allow_html=True)
     
     # Features showcase - MOVED TO TOP
-    st.markdown("""
-    <div class="features-grid">
-        <div class="feature-card">
-            <h4>🔍 Intelligent Search & Retrieval</h4>
-            <p>Find the exact information you need with our hybrid AI system that combines semantic understanding with context-aware ranking for 95%+ accuracy.</p>
-        </div>
-        <div class="feature-card">
-            <h4>⚡ Lightning-Fast Processing</h4>
-            <p>Powered by Groq's ultra-fast inference engine, get answers in milliseconds instead of minutes. Process documents 10x faster than traditional methods.</p>
-        </div>
-        <div class="feature-card">
-            <h4>🧠 Context-Aware Intelligence</h4>
-            <p>Our AI doesn't just read—it understands. Preserves document context, maintains conversation memory, and delivers insights that make sense.</p>
-        </div>
-        <div class="feature-card">
-            <h4>🎯 Enterprise-Grade Accuracy</h4>
-            <p>Built for professionals who need reliable results. Advanced RAG technology ensures answers are grounded in your actual content, not generic responses.</p>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(FEATURES_HTML, unsafe_allow_html=True)
     
     # Supported formats - MOVED TO TOP
-    st.markdown("""
-    <div class="chat-container">
-        <div class="chat-header">
-            <h3>Universal Document Intelligence</h3>
-            <p>From contracts to spreadsheets, our AI understands every format. No more switching between tools—get intelligent insights from all your business documents in one place.</p>
-        </div>
-        <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 1rem; margin-top: 2rem;">
-            <div style="text-align: center; padding: 1.5rem; background: rgba(102, 126, 234, 0.1); border-radius: 15px; border: 1px solid rgba(102, 126, 234, 0.3);">
-                <div style="font-size: 2rem; margin-bottom: 0.5rem;">📄</div>
-                <strong style="color: #ffffff;">PDF Documents</strong>
-                <p style="color: #cbd5e1; font-size: 0.9rem; margin: 0.5rem 0 0 0;">Contracts, reports, manuals</p>
-            </div>
-            <div style="text-align: center; padding: 1.5rem; background: rgba(102, 126, 234, 0.1); border-radius: 15px; border: 1px solid rgba(102, 126, 234, 0.3);">
-                <div style="font-size: 2rem; margin-bottom: 0.5rem;">📝</div>
-                <strong style="color: #ffffff;">Word Documents</strong>
-                <p style="color: #cbd5e1; font-size: 0.9rem; margin: 0.5rem 0 0 0;">Proposals, policies, guides</p>
-            </div>
-            <div style="text-align: center; padding: 1.5rem; background: rgba(102, 126, 234, 0.1); border-radius: 15px; border: 1px solid rgba(102, 126, 234, 0.3);">
-                <div style="font-size: 2rem; margin-bottom: 0.5rem;">📊</div>
-                <strong style="color: #ffffff;">Excel Spreadsheets</strong>
-                <p style="color: #cbd5e1; font-size: 0.9rem; margin: 0.5rem 0 0 0;">Data analysis, reports</p>
-            </div>
-            <div style="text-align: center; padding: 1.5rem; background: rgba(102, 126, 234, 0.1); border-radius: 15px; border: 1px solid rgba(102, 126, 234, 0.3);">
-                <div style="font-size: 2rem; margin-bottom: 0.5rem;">📃</div>
-                <strong style="color: #ffffff;">Text Files</strong>
-                <p style="color: #cbd5e1; font-size: 0.9rem; margin: 0.5rem 0 0 0;">Notes, logs, scripts</p>
-            </div>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(FORMATS_HTML, unsafe_allow_html=True)
     
     # Upload section (moved below welcome and features)
-    st.markdown("""
-    <div class="upload-section">
-        <h2>Ready to Transform Your Workflow?</h2>
-        <p>Upload your documents or enter text to experience the future of document intelligence. Our AI will process your content and unlock insights you never knew existed.</p>
-    """, unsafe_allow_html=True)
+    st.markdown(UPLOAD_HTML, unsafe_allow_html=True)
     
     # File upload
     st.markdown("**📁 Choose Your Documents:**")
@@ -1085,23 +648,21 @@ else:
         progress_bar = st.progress(st.session_state.upload_progress / 100)
         st.markdown(f"<p style='color: #cbd5e1; text-align: center;'>{st.session_state.upload_status}</p>", unsafe_allow_html=True)
         
-        # File list with details
-        st.markdown("<h5 style='color: #ffffff; margin: 1rem 0;'>📋 Uploaded Files:</h5>", unsafe_allow_html=True)
-        
-        for i, file in enumerate(uploaded_files):
-            file_size = len(file.read()) / 1024  # Size in KB
-            file.seek(0)  # Reset file pointer for later use
-            
-            st.markdown(f"""
-            <div style="margin: 0.5rem 0; padding: 0.5rem; background: rgba(255, 255, 255, 0.05); border-radius: 10px;">
-                <div style="display: flex; align-items: center; gap: 0.5rem;">
-                    <span style="color: #10b981;">✅</span>
-                    <strong style="color: #ffffff;">{file.name}</strong>
-                    <span style="color: #cbd5e1; font-size: 0.9rem;">({file_size:.1f} KB)</span>
-                    <span style="color: #10b981; font-size: 0.8rem;">✓ Uploaded</span>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
+        # File list with details, emitted as a single markdown element
+        file_rows = "".join(
+            f'<div style="margin: 0.5rem 0; padding: 0.5rem; background: rgba(255, 255, 255, 0.05); border-radius: 10px;">'
+            f'<div style="display: flex; align-items: center; gap: 0.5rem;">'
+            f'<span style="color: #10b981;">✅</span>'
+            f'<strong style="color: #ffffff;">{html.escape(file.name)}</strong>'
+            f'<span style="color: #cbd5e1; font-size: 0.9rem;">({file.size / 1024:.1f} KB)</span>'
+            f'<span style="color: #10b981; font-size: 0.8rem;">✓ Uploaded</span>'
+            f'</div></div>'
+            for file in uploaded_files
+        )
+        st.markdown(
+            f"<h5 style='color: #ffffff; margin: 1rem 0;'>📋 Uploaded Files:</h5>{file_rows}",
+            unsafe_allow_html=True
+        )
         
         st.markdown("</div>", unsafe_allow_html=True)
         
@@ -1121,108 +682,59 @@ else:
     # Process button
     if st.button("🚀 Process & Activate AI Intelligence", type="primary", use_container_width=True):
         if uploaded_files or manual_text.strip():
-            # Clear ALL old data completely before processing new documents
-            st.session_state.document_sources = {}
-            st.session_state.chat_history = []
-            st.session_state.last_question = ""
-            st.session_state.vector_store = None
+            # Clear ALL old data completely before processing new documents.
+            # The vector store and its corpus hash are kept so that
+            # re-processing the same content can be short-circuited.
+            set_document_sources({})
+            clear_history()
+            st.session_state.last_question_id = None
+            st.session_state.pending_q = None
             st.session_state.retriever = None
             st.session_state.rag_chain = None
+            st.session_state.answer_cache = None
+            st.session_state.qa_cache.clear()
             st.session_state.documents = []
             st.session_state.processed = False
             
-            # Force garbage collection to clear any cached data
-            import gc
-            gc.collect()
-            
-            # Clear any cached embeddings or models
-            try:
-                import torch
-                if torch.cuda.is_available():
-                    torch.cuda.empty_cache()
-            except:
-                pass
-            
             # Initialize progress tracking
             progress_bar = st.progress(0)
             status_text = st.empty()
             
+            def report_progress(percent, message):
+                status_text.text(message)
+                progress_bar.progress(percent)
+            
             try:
-                all_docs = []
-                document_sources = {}
-                
-                # Process uploaded files with progress
+                uploads = []
                 if uploaded_files:
-                    status_text.text("📄 Loading uploaded files...")
-                    progress_bar.progress(10)
-                    
-                    for i, uploaded_file in enumerate(uploaded_files):
-                        # Show individual file progress
-                        file_progress = 10 + (i / len(uploaded_files)) * 30
-                        status_text.text(f"📄 Processing {uploaded_file.name}...")
-                        progress_bar.progress(int(file_progress))
-                        
-                        file_content = uploaded_file.read()
-                        docs = load_documents(file_content, uploaded_file.name)
-                        all_docs.extend(docs)
-                        
-                        # Store source information
-                        for doc in docs:
-                            if hasattr(doc, 'metadata') and 'source' in doc.metadata:
-                                source_name = doc.metadata['source']
-                                document_sources[source_name] = {
-                                    'type': doc.metadata.get('type', 'unknown'),
-                                    'chunks': len(docs)
-                                }
-                
-                # Process manual text
+                    uploads.extend((f.name, f) for f in uploaded_files)
                 if manual_text.strip():
-                    status_text.text("✍️ Processing manual text input...")
-                    progress_bar.progress(45)
-                    
-                    manual_docs = load_from_text(manual_text)
-                    all_docs.extend(manual_docs)
-                    
-                    # Store manual text source
-                    document_sources["Manual Input"] = {
-                        'type': 'manual',
-                        'chunks': len(manual_docs)
-                    }
+                    uploads.append((MANUAL_INPUT_SOURCE, io.BytesIO(manual_text.encode("utf-8"))))
                 
-                if all_docs:
-                    # Store document sources in session state
-                    st.session_state.document_sources = document_sources
-                    
-                    # Process documents silently
-                    
-                    # Chunk documents
-                    status_text.text("✂️ Chunking documents...")
-                    progress_bar.progress(60)
-                    
-                    chunks = chunk_data(all_docs)
-                    
-                    # Create vector store
-                    status_text.text("🧠 Creating vector embeddings...")
-                    progress_bar.progress(80)
-                    
-                    vector_store = create_vector_store(chunks)
-                    st.session_state.vector_store = vector_store
-                    
-                    # Create retriever and RAG chain
-                    status_text.text("🔗 Building RAG system...")
-                    progress_bar.progress(90)
-                    
-                    st.session_state.retriever = create_retriever(vector_store)
-                    st.session_state.rag_chain = create_rag_chain(st.session_state.retriever)
-                    st.session_state.documents = all_docs
-                    st.session_state.processed = True
-                    
-                    # Show success message
-                    st.success("🎉 AI Intelligence Successfully Activated! Your documents are now ready for questions.")
-                    
-                    st.rerun()
-                else:
-                    st.error("No valid documents found.")
+                corpus_hash = compute_corpus_hash(uploads)
+                _, vector_store, document_sources, chunks = get_or_build_vector_store(
+                    uploads, on_progress=report_progress, corpus_hash=corpus_hash
+                )
+                
+                report_progress(90, "🔗 Building RAG system...")
+                vector_store, retriever, rag_chain, answer_cache = _build_chain(corpus_hash, vector_store)
+                
+                # Store the pipeline in session state
+                st.session_state.corpus_hash = corpus_hash
+                st.session_state.vector_store = vector_store
+                st.session_state.corpus_sources = document_sources
+                set_document_sources(document_sources)
+                st.session_state.chunks = chunks
+                st.session_state.retriever = retriever
+                st.session_state.rag_chain = rag_chain
+                st.session_state.answer_cache = answer_cache
+                st.session_state.documents = chunks
+                st.session_state.processed = True
+                
+                # Show success message
+                st.success("🎉 AI Intelligence Successfully Activated! Your documents are now ready for questions.")
+                
+                st.rerun()
                     
             except Exception as e:
                 error_msg = str(e)
@@ -1239,7 +751,7 @@ else:
     st.markdown("---")
     if st.button("🎨 Experience the Interface (Demo Mode)", use_container_width=True, help="See the full interface without downloading AI models"):
         st.session_state.documents = [{"source": "Demo Document", "type": "demo"}]
-        st.session_state.document_sources = {"Demo Document": {"type": "demo", "chunks": 3}}
+        set_document_sources({"Demo Document": {"type": "demo", "chunks": 3}})
         st.session_state.processed = True
         st.success("🎯 Demo mode activated! Experience the full interface and test conversation features.")
         st.rerun()
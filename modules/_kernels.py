@@ -0,0 +1,85 @@
+"""
+Similarity Kernels - Numba-compiled scoring for SimpleVectorStore
+Used when numba is installed; callers fall back to a NumPy matmul otherwise
+"""
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+HAS_NUMBA = njit is not None
+
+# Rows dequantized per step on the NumPy path; keeps the float32 scratch
+# block (~1.5 MB at D=384) cache-resident
+UINT8_BLOCK_ROWS = 1024
+
+if HAS_NUMBA:
+    @njit(cache=True, parallel=True, fastmath=True)
+    def _dot_rows(matrix, query):
+        n, d = matrix.shape
+        scores = np.empty(n, dtype=np.float32)
+        # Rows are independent, so they are split across cores
+        for i in prange(n):
+            acc = np.float32(0.0)
+            for j in range(d):
+                acc += matrix[i, j] * query[j]
+            scores[i] = acc
+        return scores
+
+    @njit(cache=True, parallel=True, fastmath=True)
+    def _dot_rows_uint8(codes, query):
+        n, d = codes.shape
+        scores = np.empty(n, dtype=np.float32)
+        for i in prange(n):
+            acc = np.float32(0.0)
+            for j in range(d):
+                acc += np.float32(codes[i, j]) * query[j]
+            scores[i] = acc
+        return scores
+
+def dot_rows(matrix: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """
+    Scores every row of ``matrix`` against ``query``.
+
+    Args:
+        matrix: An (N, D) float32 array.
+        query: A (D,) vector.
+
+    Returns:
+        An (N,) float32 array of dot products.
+    """
+    if not HAS_NUMBA:
+        return matrix @ query
+    # The kernel is compiled for C-contiguous float32 inputs
+    return _dot_rows(
+        np.ascontiguousarray(matrix, dtype=np.float32),
+        np.ascontiguousarray(query, dtype=np.float32)
+    )
+
+def dot_rows_uint8(codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """
+    Scores every row of a uint8 code matrix against a float query, reading
+    one byte per element instead of four.
+
+    Only the Numba kernel is faster than a float32 matmul; the blocked NumPy
+    path is a correct but slower fallback, so SimpleVectorStore doesn't
+    quantize when numba is missing.
+
+    Args:
+        codes: An (N, D) uint8 array.
+        query: A (D,) vector.
+
+    Returns:
+        An (N,) float32 array of dot products.
+    """
+    query = np.ascontiguousarray(query, dtype=np.float32)
+    if HAS_NUMBA:
+        return _dot_rows_uint8(np.ascontiguousarray(codes), query)
+    scores = np.empty(codes.shape[0], dtype=np.float32)
+    for start in range(0, codes.shape[0], UINT8_BLOCK_ROWS):
+        block = codes[start:start + UINT8_BLOCK_ROWS]
+        scores[start:start + len(block)] = block.astype(np.float32) @ query
+    return scores
@@ -3,16 +3,62 @@
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnablePassthrough
 from langchain_core.output_parsers import StrOutputParser
-# Import ChatGroq instead of HuggingFaceHub
-from langchain_groq import ChatGroq
-from langchain.retrievers import ContextualCompressionRetriever
 from typing import Any
 
-def _format_docs(docs: list) -> str:
+# llama3-8b-8192 has an 8k-token window; ~20k characters of context leaves
+# room for the prompt template and the answer
+MAX_CONTEXT_CHARS = 20000
+
+# Enhanced prompt template for better context understanding
+PROMPT_TEMPLATE = """
+    You are an expert AI assistant with deep understanding of documents and context. Your task is to provide comprehensive, accurate answers based on the provided context.
+
+    **IMPORTANT INSTRUCTIONS:**
+    1. **Context Analysis**: Carefully analyze the provided context to understand the full scope
+    2. **Comprehensive Answers**: Provide detailed, well-structured answers that cover all relevant aspects
+    3. **Source Attribution**: Reference specific parts of the context when possible
+    4. **Logical Flow**: Organize your answer in a logical, easy-to-follow structure
+    5. **Professional Tone**: Use clear, professional language suitable for business contexts
+    6. **Actionable Insights**: When possible, provide actionable insights or recommendations
+
+    **Context:**
+    {context}
+
+    **Question:**
+    {question}
+
+    **Answer Guidelines:**
+    - Start with a direct answer to the question
+    - Provide supporting details from the context
+    - Use bullet points or numbered lists for clarity when appropriate
+    - If the context doesn't contain enough information, clearly state what's missing
+    - End with a brief summary or key takeaway
+
+    **Your Answer:**
+    """
+
+# Parsed once at import and shared by every chain
+_PROMPT = ChatPromptTemplate.from_template(PROMPT_TEMPLATE)
+_OUTPUT_PARSER = StrOutputParser()
+
+def _format_docs(docs: list, max_chars: int = MAX_CONTEXT_CHARS) -> str:
     """
-    Formats the retrieved documents into a single string.
+    Formats the retrieved documents into a single string, stopping once
+    ``max_chars`` characters of context have been collected.
     """
-    return "\n\n".join(doc.page_content for doc in docs)
+    parts = []
+    total = 0
+    for doc in docs:
+        remaining = max_chars - total
+        if remaining <= 0:
+            break
+        text = doc.page_content
+        if len(text) > remaining:
+            parts.append(text[:remaining])
+            break
+        parts.append(text)
+        total += len(text) + 2  # Account for the "\n\n" separator
+    return "\n\n".join(parts)
 
 def create_rag_chain(retriever: Any):
     """
@@ -28,10 +74,14 @@ def create_rag_chain(retriever: Any):
     # 1. Initialize the LLM from Groq
     # We'll use Llama 3, which is very fast on Groq.
     # The API key is automatically read from the GROQ_API_KEY environment variable.
+    # ChatGroq is imported here so the Groq client only loads when a chain is built.
+    from langchain_groq import ChatGroq
+    
     try:
         llm = ChatGroq(
             temperature=0, 
-            model_name="llama3-8b-8192"
+            model_name="llama3-8b-8192",
+            streaming=True
         )
     except Exception as e:
         if "groq_api_key" in str(e).lower() or "api_key" in str(e).lower():
@@ -44,41 +94,12 @@ def create_rag_chain(retriever: Any):
         else:
             raise Exception(f"Error initializing Groq LLM: {e}")
 
-    # 2. Create the enhanced prompt template for better context understanding
-    prompt_template = """
-    You are an expert AI assistant with deep understanding of documents and context. Your task is to provide comprehensive, accurate answers based on the provided context.
-
-    **IMPORTANT INSTRUCTIONS:**
-    1. **Context Analysis**: Carefully analyze the provided context to understand the full scope
-    2. **Comprehensive Answers**: Provide detailed, well-structured answers that cover all relevant aspects
-    3. **Source Attribution**: Reference specific parts of the context when possible
-    4. **Logical Flow**: Organize your answer in a logical, easy-to-follow structure
-    5. **Professional Tone**: Use clear, professional language suitable for business contexts
-    6. **Actionable Insights**: When possible, provide actionable insights or recommendations
-
-    **Context:**
-    {context}
-
-    **Question:**
-    {question}
-
-    **Answer Guidelines:**
-    - Start with a direct answer to the question
-    - Provide supporting details from the context
-    - Use bullet points or numbered lists for clarity when appropriate
-    - If the context doesn't contain enough information, clearly state what's missing
-    - End with a brief summary or key takeaway
-
-    **Your Answer:**
-    """
-    prompt = ChatPromptTemplate.from_template(prompt_template)
-
-    # 3. Create the RAG chain using LCEL
+    # 2. Create the RAG chain using LCEL
     rag_chain = (
         {"context": retriever | _format_docs, "question": RunnablePassthrough()}
-        | prompt
+        | _PROMPT
         | llm
-        | StrOutputParser()
+        | _OUTPUT_PARSER
     )
     
     return rag_chain
\ No newline at end of file
@@ -1,44 +1,92 @@
+import os
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 from typing import List
 
-def chunk_data(data: List[Document], chunk_size: int = 1000, chunk_overlap: int = 100) -> List[Document]:
+# Each worker is a freshly spawned interpreter that re-imports langchain and
+# tiktoken, which takes about as long as splitting this much text in-process.
+# Measured in characters rather than documents because PDFs arrive one
+# document per page.
+PARALLEL_CHARS_PER_WORKER = 1_000_000
+
+# Chunk sizes are counted in tokens. all-MiniLM-L6-v2 truncates its input at
+# 256 word pieces, so larger chunks would lose their tail at embedding time.
+CHUNK_SIZE = 256
+CHUNK_OVERLAP = 32
+
+@lru_cache(maxsize=8)
+def _get_splitter(chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+    """Build a token-counting splitter once per (chunk_size, chunk_overlap)."""
+    return RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separators=["\n\n", "\n", ". ", " ", ""]
+    )
+
+def _dedupe_chunks(chunks: List[Document]) -> List[Document]:
+    """Drop chunks whose text repeats an earlier chunk (headers, footers, boilerplate)."""
+    seen = set()
+    out = []
+    for chunk in chunks:
+        h = hashlib.blake2b(chunk.page_content.encode(), digest_size=16).digest()
+        if h in seen:
+            continue
+        seen.add(h)
+        out.append(chunk)
+    return out
+
+def chunk_data(data: List[Document], chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP) -> List[Document]:
     """
     Splits a list of documents into smaller chunks.
     
     Args:
         data: A list of Document objects to be split.
-        chunk_size: The maximum size of each chunk (in characters).
-        chunk_overlap: The number of characters to overlap between chunks.
+        chunk_size: The maximum size of each chunk (in tokens).
+        chunk_overlap: The number of tokens to overlap between chunks.
         
     Returns:
-        A list of chunked Document objects.
+        A list of chunked Document objects, without duplicate texts.
     """
-    print(f"Chunker: Processing {len(data)} documents")
-    
-    # Check input documents
-    for i, doc in enumerate(data):
-        if not hasattr(doc, 'page_content'):
-            print(f"Chunker Warning: Document {i} has no page_content attribute")
-            continue
-        if not doc.page_content or not doc.page_content.strip():
-            print(f"Chunker Warning: Document {i} has empty page_content")
-            continue
-        print(f"Chunker: Document {i} has {len(doc.page_content)} characters")
-    
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap
-    )
-    
-    chunks = text_splitter.split_documents(data)
-    print(f"Chunker: Created {len(chunks)} chunks")
-    
-    # Check output chunks
-    for i, chunk in enumerate(chunks[:3]):  # Show first 3 chunks
-        if hasattr(chunk, 'page_content'):
-            print(f"Chunker: Chunk {i} has {len(chunk.page_content)} characters")
-        else:
-            print(f"Chunker Warning: Chunk {i} has no page_content attribute")
-    
-    return chunks
\ No newline at end of file
+    return _dedupe_chunks(_get_splitter(chunk_size, chunk_overlap).split_documents(data))
+
+def _chunk_one(doc: Document, chunk_size: int, chunk_overlap: int) -> List[Document]:
+    """Chunk a single document (top-level so worker processes can unpickle it)."""
+    return chunk_data([doc], chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+def chunk_data_parallel(data: List[Document], chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP) -> List[Document]:
+    """
+    Splits documents into chunks, spreading the work across CPU cores.
+
+    Splitting is pure CPU work and independent per document, so each document
+    is chunked in a worker process. Inputs with less than two workers' worth
+    of text (``PARALLEL_CHARS_PER_WORKER`` each) are chunked in-process.
+
+    Args:
+        data: A list of Document objects to be split.
+        chunk_size: The maximum size of each chunk (in tokens).
+        chunk_overlap: The number of tokens to overlap between chunks.
+
+    Returns:
+        A list of chunked Document objects, in input order, without duplicate texts.
+    """
+    total_chars = sum(len(doc.page_content) for doc in data)
+    # Never start more workers than there are documents to hand out
+    workers = min(os.cpu_count() or 1, len(data), total_chars // PARALLEL_CHARS_PER_WORKER)
+    if workers < 2:
+        return chunk_data(data, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+    chunk_one = partial(_chunk_one, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    # PDFs arrive one document per page; batching pages per task avoids an
+    # inter-process round trip for every page
+    chunksize = max(1, len(data) // (4 * workers))
+    # The Streamlit server is multi-threaded (server, loader and rerank pools,
+    # model pre-warm), and forking it can deadlock on locks those threads hold
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        chunks_nested = list(executor.map(chunk_one, data, chunksize=chunksize))
+
+    # Each worker only de-duplicates within its own document
+    return _dedupe_chunks([chunk for chunks in chunks_nested for chunk in chunks])
@@ -1,43 +1,70 @@
-import os
 import io
+import zipfile
+import xml.etree.ElementTree as ET
 from typing import List
 from langchain_core.documents import Document
-from langchain_community.document_loaders import PyPDFLoader, TextLoader, UnstructuredWordDocumentLoader, UnstructuredExcelLoader
-import pandas as pd
-from docx import Document as DocxDocument
+from pypdf import PdfReader
+import openpyxl
 
-def load_pdf(file_content: bytes, filename: str) -> List[Document]:
-    """Load PDF documents from file content."""
+# WordprocessingML tags for paragraphs, runs, text, tabs and line breaks
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_P = f"{_W_NS}p"
+_W_R = f"{_W_NS}r"
+_W_T = f"{_W_NS}t"
+_W_TAB = f"{_W_NS}tab"
+_W_BR = f"{_W_NS}br"
+_W_CR = f"{_W_NS}cr"
+
+def _paragraph_text(paragraph) -> str:
+    """Joins a w:p element's text in document order, as python-docx does for tabs and breaks."""
+    parts = []
+    # Only run content counts; w:pPr also holds w:tab elements (tab stop definitions)
+    for run in paragraph.iter(_W_R):
+        for elem in run:
+            if elem.tag == _W_T:
+                if elem.text:
+                    parts.append(elem.text)
+            elif elem.tag == _W_TAB:
+                parts.append("\t")
+            elif elem.tag in (_W_BR, _W_CR):
+                parts.append("\n")
+    return "".join(parts)
+
+def load_pdf(file_path: str, filename: str) -> List[Document]:
+    """Load PDF documents from a file on disk."""
     try:
-        # Save temporary file
-        temp_path = f"temp_{filename}"
-        with open(temp_path, "wb") as f:
-            f.write(file_content)
-        
-        # Load with PyPDFLoader
-        loader = PyPDFLoader(temp_path)
-        docs = loader.load()
-        
-        # Clean up
-        os.remove(temp_path)
-        
-        # Add metadata
-        for doc in docs:
-            doc.metadata["source"] = filename
-            doc.metadata["type"] = "pdf"
+        # Read pages with pypdf directly; extract each page's text once
+        reader = PdfReader(file_path)
+        docs = []
+        for i, page in enumerate(reader.pages):
+            text = page.extract_text() or ""
+            if not text.strip():
+                # Skip blank and image-only pages
+                continue
+            docs.append(Document(
+                page_content=text,
+                metadata={"source": filename, "type": "pdf", "page": i}
+            ))
         
         return docs
     except Exception as e:
         raise RuntimeError(f"Failed to load PDF {filename}: {e}")
 
-def load_docx(file_content: bytes, filename: str) -> List[Document]:
-    """Load DOCX documents from file content."""
+def load_docx(file_path: str, filename: str) -> List[Document]:
+    """Load DOCX documents from a file on disk."""
     try:
-        # Load with python-docx
-        doc = DocxDocument(io.BytesIO(file_content))
+        # Stream word/document.xml directly instead of building python-docx's object model
+        paragraphs = []
+        with zipfile.ZipFile(file_path) as z, z.open("word/document.xml") as xml_file:
+            for _, elem in ET.iterparse(xml_file):
+                if elem.tag == _W_P:
+                    paragraph = _paragraph_text(elem)
+                    if paragraph.strip():
+                        paragraphs.append(paragraph)
+                    # Free parsed paragraphs as we go
+                    elem.clear()
         
-        # Extract text from paragraphs
-        text = "\n".join([paragraph.text for paragraph in doc.paragraphs if paragraph.text.strip()])
+        text = "\n".join(paragraphs)
         
         # Create document
         doc_obj = Document(
@@ -49,32 +76,63 @@ def load_docx(file_content: bytes, filename: str) -> List[Document]:
     except Exception as e:
         raise RuntimeError(f"Failed to load DOCX {filename}: {e}")
 
-def load_excel(file_content: bytes, filename: str) -> List[Document]:
-    """Load Excel documents from file content."""
+def load_excel(file_path: str, filename: str) -> List[Document]:
+    """Load Excel documents from a file on disk, one document per sheet."""
     try:
-        # Load with pandas
-        df = pd.read_excel(io.BytesIO(file_content), sheet_name=None)
+        if filename.lower().endswith('.xls'):
+            # Legacy .xls workbooks aren't readable by openpyxl
+            return _load_xls(file_path, filename)
         
-        docs = []
-        for sheet_name, sheet_df in df.items():
-            # Convert DataFrame to text
-            text = f"Sheet: {sheet_name}\n\n"
-            text += sheet_df.to_string(index=False)
-            
-            doc = Document(
-                page_content=text,
-                metadata={"source": filename, "type": "excel", "sheet": sheet_name}
-            )
-            docs.append(doc)
+        # Stream rows in read-only mode instead of building DataFrames
+        wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            docs = []
+            for ws in wb.worksheets:
+                buf = io.StringIO()
+                buf.write(f"Sheet: {ws.title}\n\n")
+                for row in ws.iter_rows(values_only=True):
+                    buf.write("\t".join("" if v is None else str(v) for v in row))
+                    buf.write("\n")
+                
+                doc = Document(
+                    page_content=buf.getvalue(),
+                    metadata={"source": filename, "type": "excel", "sheet": ws.title}
+                )
+                docs.append(doc)
+        finally:
+            # Read-only workbooks keep the file open until closed
+            wb.close()
         
         return docs
     except Exception as e:
         raise RuntimeError(f"Failed to load Excel {filename}: {e}")
 
-def load_text(file_content: bytes, filename: str) -> List[Document]:
-    """Load text documents from file content."""
+def _load_xls(file_path: str, filename: str) -> List[Document]:
+    """Load a legacy .xls workbook with pandas."""
+    # Imported here so pandas only loads when a legacy workbook is uploaded
+    import pandas as pd
+    
+    df = pd.read_excel(file_path, sheet_name=None)
+    
+    docs = []
+    for sheet_name, sheet_df in df.items():
+        # Convert DataFrame to text
+        text = f"Sheet: {sheet_name}\n\n"
+        text += sheet_df.to_string(index=False)
+        
+        doc = Document(
+            page_content=text,
+            metadata={"source": filename, "type": "excel", "sheet": sheet_name}
+        )
+        docs.append(doc)
+    
+    return docs
+
+def load_text(file_path: str, filename: str) -> List[Document]:
+    """Load text documents from a file on disk."""
     try:
-        text = file_content.decode('utf-8')
+        with open(file_path, encoding='utf-8') as f:
+            text = f.read()
         
         doc = Document(
             page_content=text,
@@ -85,18 +143,18 @@ def load_text(file_content: bytes, filename: str) -> List[Document]:
     except Exception as e:
         raise RuntimeError(f"Failed to load text {filename}: {e}")
 
-def load_documents(file_content: bytes, filename: str) -> List[Document]:
-    """Load documents based on file extension."""
+def load_documents(file_path: str, filename: str) -> List[Document]:
+    """Load documents from a file on disk based on the original file's extension."""
     file_extension = filename.lower().split('.')[-1]
     
     if file_extension == 'pdf':
-        return load_pdf(file_content, filename)
+        return load_pdf(file_path, filename)
     elif file_extension in ['doc', 'docx']:
-        return load_docx(file_content, filename)
+        return load_docx(file_path, filename)
     elif file_extension in ['xls', 'xlsx']:
-        return load_excel(file_content, filename)
+        return load_excel(file_path, filename)
     elif file_extension == 'txt':
-        return load_text(file_content, filename)
+        return load_text(file_path, filename)
     else:
         raise ValueError(f"Unsupported file type: {file_extension}")
 
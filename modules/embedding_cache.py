@@ -0,0 +1,151 @@
+"""
+Embedding Cache - persists document embeddings across runs
+Vectors are stored in SQLite, keyed by (sha256 of the text, model name)
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import numpy as np
+from typing import Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_CACHE_PATH = os.path.join("cache", "embeddings.sqlite3")
+
+_DEFAULT_EMBED_BATCH = 64
+
+def _batch_size_from_env() -> int:
+    """Reads SMARTDOC_EMBED_BATCH, falling back to the default when it isn't a positive integer."""
+    raw = os.environ.get("SMARTDOC_EMBED_BATCH")
+    if raw is None:
+        return _DEFAULT_EMBED_BATCH
+    try:
+        value = int(raw)
+    except ValueError:
+        logger.warning("Ignoring non-integer SMARTDOC_EMBED_BATCH=%r; using %s", raw, _DEFAULT_EMBED_BATCH)
+        return _DEFAULT_EMBED_BATCH
+    if value < 1:
+        logger.warning("SMARTDOC_EMBED_BATCH=%r must be at least 1; using 1", raw)
+    return max(1, value)
+
+# Number of texts sent to the embedding model per call
+EMBED_BATCH_SIZE = _batch_size_from_env()
+
+# Stay well under SQLite's bound-parameter limit on older builds
+_LOOKUP_BATCH = 500
+
+def model_cache_key(embedding_model) -> str:
+    """Returns the model name for an embedding model, unwrapping caching wrappers."""
+    while hasattr(embedding_model, "embedding_model"):
+        embedding_model = embedding_model.embedding_model
+    return getattr(embedding_model, "model_name", None) or type(embedding_model).__name__
+
+def _connect(path: str) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS embeddings ("
+        "hash BLOB NOT NULL, model TEXT NOT NULL, vec BLOB NOT NULL, "
+        "PRIMARY KEY (hash, model))"
+    )
+    return conn
+
+def _fetch(conn: sqlite3.Connection, model: str, hashes: List[bytes]) -> Dict[bytes, np.ndarray]:
+    found = {}
+    unique = list(dict.fromkeys(hashes))
+    for start in range(0, len(unique), _LOOKUP_BATCH):
+        batch = unique[start:start + _LOOKUP_BATCH]
+        placeholders = ",".join("?" * len(batch))
+        rows = conn.execute(
+            f"SELECT hash, vec FROM embeddings WHERE model = ? AND hash IN ({placeholders})",
+            [model, *batch]
+        )
+        for digest, vec in rows:
+            found[bytes(digest)] = np.frombuffer(vec, dtype=np.float32)
+    return found
+
+def embed_in_batches(embedding_model, texts: List[str], batch_size: int = EMBED_BATCH_SIZE) -> np.ndarray:
+    """
+    Embeds texts through the model in fixed-size batches, writing each batch
+    into one preallocated float32 array.
+
+    Args:
+        embedding_model: The embedding model.
+        texts: The texts to embed.
+        batch_size: Texts per ``embed_documents`` call.
+
+    Returns:
+        A (len(texts), D) float32 array.
+    """
+    embeddings = None
+    for start in range(0, len(texts), batch_size):
+        batch = np.asarray(embedding_model.embed_documents(texts[start:start + batch_size]), dtype=np.float32)
+        if embeddings is None:
+            # The dimension is only known once the first batch comes back
+            embeddings = np.empty((len(texts), batch.shape[1]), dtype=np.float32)
+        embeddings[start:start + len(batch)] = batch
+    return embeddings if embeddings is not None else np.empty((0, 0), dtype=np.float32)
+
+def embed_documents_cached(
+    embedding_model,
+    texts: List[str],
+    embed_fn: Callable[[List[str]], List[List[float]]] = None,
+    path: str = EMBEDDING_CACHE_PATH
+) -> np.ndarray:
+    """
+    Embeds texts, reading previously computed vectors from the on-disk cache
+    and only running the model on texts it hasn't seen before.
+
+    Args:
+        embedding_model: The embedding model; its name is part of the cache key.
+        texts: The texts to embed.
+        embed_fn: Optional function that embeds a list of texts; defaults to
+            ``embed_in_batches`` with ``embedding_model``.
+        path: The SQLite database file.
+
+    Returns:
+        A (len(texts), D) float32 array, in the order of ``texts``.
+    """
+    embed_fn = embed_fn or (lambda batch: embed_in_batches(embedding_model, batch))
+    if not texts:
+        return np.empty((0, 0), dtype=np.float32)
+
+    try:
+        conn = _connect(path)
+    except (sqlite3.Error, OSError) as e:
+        logger.warning("Embedding cache unavailable, embedding without it: %s", e)
+        return np.asarray(embed_fn(texts), dtype=np.float32)
+
+    try:
+        model = model_cache_key(embedding_model)
+        hashes = [hashlib.sha256(text.encode("utf-8")).digest() for text in texts]
+        try:
+            vectors = _fetch(conn, model, hashes)
+        except sqlite3.Error as e:
+            logger.warning("Ignoring unreadable embedding cache: %s", e)
+            vectors = {}
+
+        # First position of each text that still needs embedding
+        missing = {}
+        for i, digest in enumerate(hashes):
+            if digest not in vectors and digest not in missing:
+                missing[digest] = i
+
+        if missing:
+            new_vectors = np.asarray(embed_fn([texts[i] for i in missing.values()]), dtype=np.float32)
+            vectors.update(zip(missing, new_vectors))
+            try:
+                with conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO embeddings (hash, model, vec) VALUES (?, ?, ?)",
+                        [(digest, model, vec.tobytes()) for digest, vec in zip(missing, new_vectors)]
+                    )
+            except sqlite3.Error as e:
+                logger.warning("Skipping embedding cache write: %s", e)
+
+        logger.debug("Embedding cache: %s reused, %s embedded", len(hashes) - len(missing), len(missing))
+        return np.vstack([vectors[digest] for digest in hashes])
+    finally:
+        conn.close()
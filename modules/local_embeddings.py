@@ -0,0 +1,59 @@
+"""
+Local Embeddings - dependency-free fallback embedding model
+Feature-hashes text into fixed-size vectors when no Hugging Face model loads
+"""
+
+import hashlib
+import numpy as np
+
+# Dimension of all-MiniLM-L6-v2, so fallback vectors have the same shape
+EMBEDDING_DIMENSIONS = 384
+
+def hash_embedding(text: str, dim: int = EMBEDDING_DIMENSIONS) -> np.ndarray:
+    """
+    Deterministic feature-hashed unit vector for ``text``, identical across
+    processes (unlike ``hash()``) and independent of any global RNG state.
+    """
+    # shake_128 yields exactly one byte per dimension (blake2b caps at 64 bytes)
+    digest = hashlib.shake_128(text.encode()).digest(dim)
+    vector = np.frombuffer(digest, dtype=np.uint8).astype(np.float32) / 255.0
+    vector /= np.linalg.norm(vector) + 1e-12
+    return vector
+
+class LocalEmbeddings:
+    """
+    Vercel-optimized lightweight embedding model.
+    Creates simple vector representations without heavy dependencies.
+    """
+
+    def __init__(self, dimensions=EMBEDDING_DIMENSIONS):
+        self.dimensions = dimensions
+
+    def embed_documents(self, texts):
+        """Create simple embeddings for documents."""
+        if not texts:
+            return []
+
+        # Returned as one float32 matrix rather than lists the caller re-arrays
+        return np.array([
+            # Handle empty text with a fixed random vector, else hash the text
+            self._create_random_embedding() if not text or not text.strip() else self._text_to_embedding(text)
+            for text in texts
+        ], dtype=np.float32)
+
+    def embed_query(self, text):
+        """Create embedding for a query."""
+        if not text or not text.strip():
+            return self._create_random_embedding().tolist()
+        return self._text_to_embedding(text).tolist()
+
+    def _text_to_embedding(self, text):
+        """Convert text to a simple embedding vector by feature hashing."""
+        return hash_embedding(text, self.dimensions)
+
+    def _create_random_embedding(self):
+        """Create a fixed random unit vector for empty text."""
+        # A private generator, so the process-wide random state is untouched
+        vector = np.random.default_rng(42).uniform(-1.0, 1.0, self.dimensions).astype(np.float32)
+        vector /= np.linalg.norm(vector)
+        return vector
@@ -1,8 +1,135 @@
 from langchain.retrievers import ContextualCompressionRetriever
 from langchain.retrievers.document_compressors import CrossEncoderReranker
-from langchain_community.cross_encoders import HuggingFaceCrossEncoder
-from langchain_community.vectorstores import Chroma
-from typing import Union, Any
+from langchain_core.documents import Document
+from typing import Any, Optional, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import asyncio
+import numpy as np
+
+# Query + passage pairs longer than this are truncated before scoring
+CROSS_ENCODER_MAX_LENGTH = 256
+
+# Caps concurrent cross-encoder forward passes when questions are answered
+# concurrently; threads are only started once a rerank is submitted
+_RERANK_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="rerank")
+
+# int8-quantized ONNX export published alongside the cross-encoder weights
+ONNX_SUBFOLDER = "onnx"
+ONNX_FILE_NAME = "model_quint8_avx2.onnx"
+
+class _OnnxCrossEncoderClient:
+    """
+    Scores (query, passage) pairs with an ONNX Runtime sequence classifier,
+    mirroring the ``predict`` signature of sentence-transformers' CrossEncoder.
+    """
+    
+    def __init__(self, model, tokenizer, max_length: int = CROSS_ENCODER_MAX_LENGTH):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.max_length = max_length
+    
+    def predict(self, pairs, batch_size: int = 32, convert_to_numpy: bool = True):
+        scores = []
+        for start in range(0, len(pairs), batch_size):
+            batch = pairs[start:start + batch_size]
+            features = self.tokenizer(
+                [query for query, _ in batch],
+                [passage for _, passage in batch],
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="np"
+            )
+            logits = self.model(**features).logits
+            scores.append(np.asarray(logits, dtype=np.float32).reshape(len(batch), -1)[:, -1])
+        scores = np.concatenate(scores) if scores else np.empty(0, dtype=np.float32)
+        return scores if convert_to_numpy else scores.tolist()
+
+def _load_onnx_cross_encoder(model_name: str):
+    """
+    Loads the int8 ONNX build of a cross-encoder on the CPU execution provider.
+    Raises if optimum/onnxruntime or the quantized file are unavailable.
+    """
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+    from transformers import AutoTokenizer
+    from langchain_community.cross_encoders.base import BaseCrossEncoder
+    
+    class OnnxCrossEncoder(BaseCrossEncoder):
+        def __init__(self, client):
+            self.client = client
+        
+        def score(self, text_pairs):
+            return self.client.predict(text_pairs, convert_to_numpy=False)
+    
+    model = ORTModelForSequenceClassification.from_pretrained(
+        model_name,
+        subfolder=ONNX_SUBFOLDER,
+        file_name=ONNX_FILE_NAME,
+        provider="CPUExecutionProvider"
+    )
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    return OnnxCrossEncoder(_OnnxCrossEncoderClient(model, tokenizer))
+
+@lru_cache(maxsize=2)
+def _get_cross_encoder(model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"):
+    """
+    Loads a cross-encoder once per process and reuses it, so rebuilding the
+    retriever doesn't reload the model weights. Prefers the int8 ONNX build
+    and falls back to the FP32 PyTorch model.
+    """
+    try:
+        model = _load_onnx_cross_encoder(model_name)
+        print("Using int8 ONNX cross-encoder for reranking")
+        return model
+    except Exception as e:
+        print(f"ONNX cross-encoder unavailable, using PyTorch model: {e}")
+    
+    # Imported here so sentence-transformers/torch only load when reranking is used
+    from langchain_community.cross_encoders import HuggingFaceCrossEncoder
+    model = HuggingFaceCrossEncoder(model_name=model_name)
+    model.client.max_length = CROSS_ENCODER_MAX_LENGTH
+    return model
+
+class BatchedCrossEncoderReranker(CrossEncoderReranker):
+    """
+    A CrossEncoderReranker that scores every (query, document) pair in one
+    batched ``predict`` call and selects the top documents with NumPy.
+    Async reranks run on a small shared thread pool.
+    """
+    
+    batch_size: int = 32
+    
+    def compress_documents(
+        self,
+        documents: Sequence[Document],
+        query: str,
+        callbacks: Optional[Any] = None,
+    ) -> Sequence[Document]:
+        if not documents:
+            return []
+        
+        pairs = [(query, doc.page_content) for doc in documents]
+        client = getattr(self.model, "client", None)
+        if client is not None:
+            scores = client.predict(pairs, batch_size=self.batch_size, convert_to_numpy=True)
+        else:
+            scores = np.asarray(self.model.score(pairs))
+        
+        top = np.argsort(-scores)[: self.top_n]
+        return [documents[i] for i in top]
+    
+    async def acompress_documents(
+        self,
+        documents: Sequence[Document],
+        query: str,
+        callbacks: Optional[Any] = None,
+    ) -> Sequence[Document]:
+        # Score on the dedicated rerank pool instead of the event loop's default executor
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _RERANK_EXECUTOR, self.compress_documents, documents, query, callbacks
+        )
 
 def create_retriever(
     vectorstore: Any,  # Changed from Chroma to Any to handle different types
@@ -16,19 +143,22 @@ def create_retriever(
 
     Args:
         vectorstore: The vector store instance (ChromaDB or fallback).
-        search_k: The number of documents to retrieve initially (increased for more context).
+        search_k: The number of diverse candidates MMR passes to the reranker,
+            chosen from a pool of ``search_k * 3``.
         reranker_top_n: The number of documents to return after reranking (increased for coverage).
 
     Returns:
         A retriever instance with enhanced context retrieval.
     """
-    # 1. Initialize the base retriever with more context
+    # 1. Initialize the base retriever; MMR picks a diverse shortlist so the
+    # reranker scores fewer, less redundant candidates
     try:
         base_retriever = vectorstore.as_retriever(
+            search_type="mmr",
             search_kwargs={
                 "k": search_k,
-                "fetch_k": search_k * 2,  # Fetch more for better selection
-                "score_threshold": 0.5  # Only return relevant documents
+                "fetch_k": search_k * 3,  # Candidate pool MMR selects from
+                "lambda_mult": 0.5
             }
         )
     except Exception as e:
@@ -44,13 +174,13 @@ def create_retriever(
     try:
         # 2. Try to initialize the Cross-Encoder model for reranking
         print("Loading advanced reranker for better context selection...")
-        cross_encoder_model = HuggingFaceCrossEncoder(model_name='cross-encoder/ms-marco-MiniLM-L-6-v2')
+        cross_encoder_model = _get_cross_encoder('cross-encoder/ms-marco-MiniLM-L-6-v2')
         
-        # 3. Initialize the LangChain reranker with better parameters
-        reranker = CrossEncoderReranker(
+        # 3. Initialize the batched reranker; all candidates are scored in one pass
+        reranker = BatchedCrossEncoderReranker(
             model=cross_encoder_model, 
             top_n=reranker_top_n,
-            threshold=0.5  # Only keep highly relevant documents
+            batch_size=32
         )
         
         # 4. Create the enhanced compression retriever
@@ -0,0 +1,81 @@
+"""
+Semantic Cache - reuses answers for repeated and paraphrased questions
+Compares normalized question embeddings with a single matrix-vector product
+"""
+
+import threading
+import time
+import numpy as np
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+
+class SemanticCache:
+    """
+    A small in-memory cache mapping question embeddings to answers.
+    A lookup hits when a stored question is at least ``threshold`` cosine-similar.
+    """
+
+    def __init__(self, threshold: float = 0.95, max_entries: int = 128, ttl_seconds: float = 3600):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries = []  # (unit embedding, answer, sources, timestamp), oldest first
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _evict_expired(self):
+        cutoff = time.time() - self.ttl_seconds
+        self.entries = [entry for entry in self.entries if entry[3] >= cutoff]
+
+    def lookup(self, embedding: List[float]) -> Optional[Tuple[Any, List[str]]]:
+        """Return the (answer, sources) of the most similar cached question, if close enough."""
+        self._evict_expired()
+        if not self.entries:
+            return None
+
+        matrix = np.vstack([entry[0] for entry in self.entries])
+        sims = matrix @ self._normalize(embedding)
+        best = int(np.argmax(sims))
+        if sims[best] > self.threshold:
+            _, answer, sources, _ = self.entries[best]
+            return answer, sources
+        return None
+
+    def add(self, embedding: List[float], answer: Any, sources: List[str]):
+        """Cache an answer, evicting the oldest entry once full."""
+        self.entries.append((self._normalize(embedding), answer, sources, time.time()))
+        if len(self.entries) > self.max_entries:
+            self.entries = self.entries[-self.max_entries:]
+
+    def clear(self):
+        self.entries = []
+
+class AnswerCache:
+    """
+    A thread-safe LRU map from normalized question to answer.
+    Unlike ``functools.lru_cache`` it can be filled after the fact, which
+    lets answers that were streamed token by token be stored once complete.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key: str, value: Any):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
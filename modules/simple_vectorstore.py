@@ -3,9 +3,45 @@ Simple Vector Store - SQLite-independent alternative for ChromaDB
 Uses in-memory storage to avoid SQLite compatibility issues
 """
 
+import logging
+import os
 import numpy as np
-from typing import List, Dict, Any
+from typing import List
 from langchain_core.documents import Document
+from .embedding_cache import embed_documents_cached
+from ._kernels import HAS_NUMBA, dot_rows, dot_rows_uint8
+from .local_embeddings import EMBEDDING_DIMENSIONS, hash_embedding
+
+logger = logging.getLogger(__name__)
+
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+# Above this many documents, search goes through a FAISS HNSW graph (when
+# faiss is installed) instead of scanning every row
+ANN_MIN_DOCS = 5000
+HNSW_M = 32
+
+# Scan int8 scalar-quantized vectors instead of float32 (4x fewer bytes per
+# query, at a small recall cost); off unless SMARTDOC_INT8_EMBEDDINGS=1.
+# Needs numba: without it, scoring the codes is slower than the float32
+# matmul, so the store ignores the setting
+QUANTIZE_EMBEDDINGS = os.environ.get("SMARTDOC_INT8_EMBEDDINGS") == "1"
+
+def _top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Returns the indices of the ``k`` highest scores, best first.
+    Partitions in O(N) and only sorts the selected ``k``.
+    """
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k == scores.shape[0]:
+        return np.argsort(-scores)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
 
 class SimpleRetriever:
     """Simple retriever that implements the LangChain retriever interface."""
@@ -38,116 +74,251 @@ class SimpleRetriever:
 class SimpleVectorStore:
     """
     A simple, lightweight vector store that doesn't require SQLite.
-    Stores embeddings in memory for fast retrieval.
+    Stores embeddings in memory for fast retrieval, as one contiguous
+    (N, D) float32 array parallel to ``documents`` and ``metadata``.
     """
     
-    def __init__(self, embedding_model, documents: List[Document] = None):
+    def __init__(self, embedding_model, documents: List[Document] = None, embeddings=None,
+                 quantize: bool = QUANTIZE_EMBEDDINGS):
         self.embedding_model = embedding_model
+        if quantize and not HAS_NUMBA:
+            logger.warning("int8 embedding search needs numba; scanning float32 embeddings instead")
+            quantize = False
+        self.quantize = quantize
         self.documents = documents or []
-        self.embeddings = []
+        self.embeddings = None  # (N, D) float32, built lazily at ingest
         self.metadata = []
+        self._norms = None  # (N,) float32 row norms; None when rows are unit length
+        self._ann_index = None  # FAISS HNSW index over unit rows, for large stores
+        self._codes = None  # (N, D) uint8 codes of the unit rows, when quantizing
+        self._code_scale = None  # (N,) float32 per-row step size
+        self._code_offset = None  # (N,) float32 per-row minimum
         
-        if documents:
+        if documents and embeddings is not None:
+            # Reuse vectors that were already computed for these documents
+            embeddings = np.asarray(embeddings, dtype=np.float32)
+            if len(embeddings) != len(self.documents):
+                raise ValueError(
+                    f"Got {len(embeddings)} embeddings for {len(self.documents)} documents"
+                )
+            # Drop the rows of empty documents too, so rows stay aligned
+            # with the documents that are kept
+            has_text = np.fromiter((bool(doc.page_content) for doc in self.documents), dtype=bool, count=len(embeddings))
+            self._keep_documents_with_text()
+            self.embeddings = embeddings if has_text.all() else embeddings[has_text]
+            self._compute_norms()
+            self._build_ann_index()
+            self._quantize()
+        elif documents:
             self._create_embeddings()
     
+    @staticmethod
+    def _row_norms(embeddings: np.ndarray):
+        """Row norms as float32, or None when every row is already unit length."""
+        norms = np.linalg.norm(embeddings, axis=1).astype(np.float32)
+        # Unit vectors (the model normalized them) make cosine a plain dot product
+        return None if np.allclose(norms, 1.0, atol=1e-3) else np.clip(norms, 1e-12, None)
+    
+    def _compute_norms(self):
+        """Precompute row norms once at ingest; they never change afterwards."""
+        if self.embeddings is None or not len(self.embeddings):
+            self._norms = None
+            return
+        self._norms = self._row_norms(self.embeddings)
+    
+    def _unit_rows(self, start: int = 0) -> np.ndarray:
+        """The stored rows from ``start`` on, scaled to unit length."""
+        rows = self.embeddings[start:]
+        if self._norms is None:
+            return np.ascontiguousarray(rows)
+        return rows / self._norms[start:, None]
+    
+    def _build_ann_index(self):
+        """Build an HNSW graph over the stored vectors once the store is large."""
+        if faiss is None or self.embeddings is None or len(self.embeddings) <= ANN_MIN_DOCS:
+            self._ann_index = None
+            return
+        # Inner product over unit vectors is cosine similarity
+        index = faiss.IndexHNSWFlat(self.embeddings.shape[1], HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        index.add(self._unit_rows())
+        self._ann_index = index
+    
+    @staticmethod
+    def _quantize_rows(rows: np.ndarray):
+        """Asymmetric per-row min/max quantization of float rows to uint8 codes."""
+        offset = rows.min(axis=1)
+        scale = np.clip((rows.max(axis=1) - offset) / 255.0, 1e-12, None).astype(np.float32)
+        codes = np.rint((rows - offset[:, None]) / scale[:, None]).astype(np.uint8)
+        return codes, scale, offset.astype(np.float32)
+    
+    def _quantize(self, start: int = 0):
+        """Quantize the unit rows from ``start`` on and append them to the codes."""
+        if not self.quantize or self.embeddings is None or not len(self.embeddings):
+            return
+        codes, scale, offset = self._quantize_rows(self._unit_rows(start))
+        if start == 0 or self._codes is None:
+            self._codes, self._code_scale, self._code_offset = codes, scale, offset
+        else:
+            self._codes = np.vstack([self._codes, codes])
+            self._code_scale = np.concatenate([self._code_scale, scale])
+            self._code_offset = np.concatenate([self._code_offset, offset])
+    
+    def _keep_documents_with_text(self) -> List[str]:
+        """
+        Drops documents without text in a single pass, filling ``metadata`` so
+        documents, metadata and embedding rows share one index. Returns the texts.
+        """
+        texts, metadata, kept = [], [], []
+        for doc in self.documents:
+            if doc.page_content:
+                texts.append(doc.page_content)
+                metadata.append(doc.metadata)
+                kept.append(doc)
+        self.documents = kept
+        self.metadata = metadata
+        return texts
+    
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        """Embed texts into a float32 matrix, without touching the store's state."""
+        try:
+            # Only texts missing from the on-disk cache reach the model
+            return embed_documents_cached(self.embedding_model, texts)
+        except Exception as e:
+            logger.warning("Error creating embeddings: %s", e)
+            return self._create_fallback_embeddings(texts)
+    
     def _create_embeddings(self):
         """Create embeddings for all documents."""
         if not self.documents:
             return
         
-        print("Creating embeddings for documents...")
-        texts = [doc.page_content for doc in self.documents if doc.page_content]
-        
-        try:
-            self.embeddings = self.embedding_model.embed_documents(texts)
-            self.metadata = [doc.metadata for doc in self.documents if doc.page_content]
-            print(f"Created {len(self.embeddings)} embeddings successfully")
-        except Exception as e:
-            print(f"Error creating embeddings: {e}")
-            # Fallback to simple random embeddings
-            self._create_fallback_embeddings(len(texts))
-    
-    def _create_fallback_embeddings(self, num_docs: int):
-        """Create simple fallback embeddings if the main model fails."""
-        print("Using fallback embeddings...")
-        self.embeddings = []
-        for i in range(num_docs):
-            # Create deterministic random embeddings
-            np.random.seed(i)
-            embedding = np.random.rand(384).tolist()  # 384 dimensions
-            self.embeddings.append(embedding)
-        self.metadata = [doc.metadata for doc in self.documents if doc.page_content]
+        logger.debug("Creating embeddings for documents...")
+        texts = self._keep_documents_with_text()
+        self.embeddings = self._embed(texts)
+        self._compute_norms()
+        self._build_ann_index()
+        self._quantize()
+        logger.debug("Created %s embeddings successfully", len(self.embeddings))
+    
+    def _create_fallback_embeddings(self, texts: List[str]) -> np.ndarray:
+        """Create simple hash-based embeddings if the main model fails."""
+        logger.warning("Using fallback embeddings...")
+        # Match vectors already in the store so rows can be stacked
+        dim = self.embeddings.shape[1] if self.embeddings is not None else EMBEDDING_DIMENSIONS
+        return np.array([hash_embedding(text, dim) for text in texts], dtype=np.float32)
     
     def similarity_search(self, query: str, k: int = 5) -> List[Document]:
         """Search for similar documents using cosine similarity."""
-        if not self.embeddings:
+        if self.embeddings is None or not len(self.embeddings):
             return []
         
         try:
             # Get query embedding
             query_embedding = self.embedding_model.embed_query(query)
         except Exception as e:
-            print(f"Error embedding query: {e}")
-            # Use simple fallback
-            np.random.seed(hash(query) % 1000)
-            query_embedding = np.random.rand(384).tolist()
+            logger.warning("Error embedding query: %s", e)
+            # Use a hash-based fallback matching the stored dimension
+            query_embedding = hash_embedding(query, self.embeddings.shape[1])
         
-        # Calculate similarities
-        similarities = []
-        for i, doc_embedding in enumerate(self.embeddings):
-            similarity = self._cosine_similarity(query_embedding, doc_embedding)
-            similarities.append((similarity, i))
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query = query / max(np.linalg.norm(query), 1e-12)
         
-        # Sort by similarity and return top k
-        similarities.sort(reverse=True)
-        top_k_indices = [idx for _, idx in similarities[:k]]
+        if self._ann_index is not None:
+            # Approximate top k from the HNSW graph; unused slots come back as -1
+            self._ann_index.hnsw.efSearch = max(64, k)
+            _, ids = self._ann_index.search(query[None, :], k)
+            return [self.documents[idx] for idx in ids[0] if idx >= 0]
         
-        results = []
-        for idx in top_k_indices:
-            if idx < len(self.documents):
-                results.append(self.documents[idx])
+        if self._codes is not None:
+            # Dequantize the dot product: row = code * scale + offset
+            scores = self._code_scale * dot_rows_uint8(self._codes, query) + self._code_offset * query.sum()
+        else:
+            # Cosine similarity against every document in one matrix-vector
+            # product (a parallel Numba kernel when numba is installed)
+            scores = dot_rows(self.embeddings, query)
+            if self._norms is not None:
+                scores /= self._norms
         
-        return results
+        top = _top_k_indices(scores, k)
+        return [self.documents[idx] for idx in top]
     
     def _cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
         """Calculate cosine similarity between two vectors."""
-        try:
-            vec1 = np.array(vec1)
-            vec2 = np.array(vec2)
-            
-            # Normalize vectors
-            norm1 = np.linalg.norm(vec1)
-            norm2 = np.linalg.norm(vec2)
-            
-            if norm1 == 0 or norm2 == 0:
-                return 0.0
-            
-            # Calculate cosine similarity
-            similarity = np.dot(vec1, vec2) / (norm1 * norm2)
-            return float(similarity)
-        except Exception:
+        vec1 = np.asarray(vec1, dtype=np.float32)
+        vec2 = np.asarray(vec2, dtype=np.float32)
+        
+        # Squared norms via vdot, so there is a single sqrt and no norm() calls
+        den = np.sqrt(np.vdot(vec1, vec1) * np.vdot(vec2, vec2))
+        if den == 0.0:
             return 0.0
+        return float(np.dot(vec1, vec2) / den)
     
     def add_documents(self, documents: List[Document]):
-        """Add new documents to the vector store."""
+        """Add new documents to the vector store, embedding only the new ones."""
+        documents = [doc for doc in documents if doc.page_content]
+        if not documents:
+            return
+        
+        new_embeddings = self._embed([doc.page_content for doc in documents])
+        new_norms = self._row_norms(new_embeddings)
+        
+        if self.embeddings is None or not len(self.embeddings):
+            self.embeddings = new_embeddings
+            self._norms = new_norms
+        else:
+            if self._norms is not None or new_norms is not None:
+                # Unit-length rows have an implicit norm of one
+                old_norms = self._norms if self._norms is not None else np.ones(len(self.embeddings), dtype=np.float32)
+                if new_norms is None:
+                    new_norms = np.ones(len(new_embeddings), dtype=np.float32)
+                self._norms = np.concatenate([old_norms, new_norms])
+            self.embeddings = np.vstack([self.embeddings, new_embeddings])
+        
         self.documents.extend(documents)
-        self._create_embeddings()
+        self.metadata.extend(doc.metadata for doc in documents)
+        
+        start = len(self.embeddings) - len(new_embeddings)
+        if self._ann_index is not None:
+            # HNSW graphs grow incrementally
+            self._ann_index.add(self._unit_rows(start))
+        else:
+            self._build_ann_index()
+        self._quantize(start)
     
     def get_document_count(self) -> int:
         """Get the total number of documents."""
         return len(self.documents)
     
+    def __getstate__(self):
+        # FAISS indexes can't be pickled; the graph is rebuilt on load. The
+        # embedding model is left out too, or every pickle would carry the
+        # model weights and every load would get a private copy of them
+        state = self.__dict__.copy()
+        state["_ann_index"] = None
+        state["embedding_model"] = None
+        return state
+    
+    def __setstate__(self, state):
+        # Imported here because vectorstore imports this module
+        from .vectorstore import _get_embedding_model
+        self.__dict__.update(state)
+        # Reattach the process-wide model (pickles written before the model
+        # was left out still carry their own copy, which is dropped here)
+        self.embedding_model = _get_embedding_model()
+        self._build_ann_index()
+    
     def as_retriever(self, **kwargs):
         """Create a retriever interface compatible with LangChain."""
         return SimpleRetriever(self)
 
-def create_simple_vector_store(docs: List[Document], embedding_model):
+def create_simple_vector_store(docs: List[Document], embedding_model, embeddings: List[List[float]] = None):
     """
     Create a simple vector store that doesn't require SQLite.
     
     Args:
         docs: List of Document objects
         embedding_model: The embedding model to use
+        embeddings: Optional precomputed embeddings, one per document
         
     Returns:
         A SimpleVectorStore instance
@@ -155,8 +326,8 @@ def create_simple_vector_store(docs: List[Document], embedding_model):
     if not docs:
         raise ValueError("No documents provided")
     
-    print("Creating simple vector store (SQLite-independent)...")
-    vectorstore = SimpleVectorStore(embedding_model, docs)
-    print("Simple vector store created successfully!")
+    logger.info("Creating simple vector store (SQLite-independent)...")
+    vectorstore = SimpleVectorStore(embedding_model, docs, embeddings=embeddings)
+    logger.info("Simple vector store created successfully!")
     
     return vectorstore
@@ -0,0 +1,91 @@
+"""
+Static HTML for the landing page and chat history, kept in an imported module so the large
+literals are built once per process rather than on every Streamlit rerun
+"""
+
+WELCOME_HTML = """
+<div class="welcome-section">
+    <h2>Stop Searching, Start Discovering</h2>
+    <p>Transform hours of document hunting into seconds of insight. Our enterprise-grade AI understands your content, remembers your conversations, and delivers precise answers that drive better decisions.</p>
+</div>
+"""
+
+FEATURES_HTML = """
+<div class="features-grid">
+    <div class="feature-card">
+        <h4>🔍 Intelligent Search & Retrieval</h4>
+        <p>Find the exact information you need with our hybrid AI system that combines semantic understanding with context-aware ranking for 95%+ accuracy.</p>
+    </div>
+    <div class="feature-card">
+        <h4>⚡ Lightning-Fast Processing</h4>
+        <p>Powered by Groq's ultra-fast inference engine, get answers in milliseconds instead of minutes. Process documents 10x faster than traditional methods.</p>
+    </div>
+    <div class="feature-card">
+        <h4>🧠 Context-Aware Intelligence</h4>
+        <p>Our AI doesn't just read—it understands. Preserves document context, maintains conversation memory, and delivers insights that make sense.</p>
+    </div>
+    <div class="feature-card">
+        <h4>🎯 Enterprise-Grade Accuracy</h4>
+        <p>Built for professionals who need reliable results. Advanced RAG technology ensures answers are grounded in your actual content, not generic responses.</p>
+    </div>
+</div>
+"""
+
+FORMATS_HTML = """
+<div class="chat-container">
+    <div class="chat-header">
+        <h3>Universal Document Intelligence</h3>
+        <p>From contracts to spreadsheets, our AI understands every format. No more switching between tools—get intelligent insights from all your business documents in one place.</p>
+    </div>
+    <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 1rem; margin-top: 2rem;">
+        <div style="text-align: center; padding: 1.5rem; background: rgba(102, 126, 234, 0.1); border-radius: 15px; border: 1px solid rgba(102, 126, 234, 0.3);">
+            <div style="font-size: 2rem; margin-bottom: 0.5rem;">📄</div>
+            <strong style="color: #ffffff;">PDF Documents</strong>
+            <p style="color: #cbd5e1; font-size: 0.9rem; margin: 0.5rem 0 0 0;">Contracts, reports, manuals</p>
+        </div>
+        <div style="text-align: center; padding: 1.5rem; background: rgba(102, 126, 234, 0.1); border-radius: 15px; border: 1px solid rgba(102, 126, 234, 0.3);">
+            <div style="font-size: 2rem; margin-bottom: 0.5rem;">📝</div>
+            <strong style="color: #ffffff;">Word Documents</strong>
+            <p style="color: #cbd5e1; font-size: 0.9rem; margin: 0.5rem 0 0 0;">Proposals, policies, guides</p>
+        </div>
+        <div style="text-align: center; padding: 1.5rem; background: rgba(102, 126, 234, 0.1); border-radius: 15px; border: 1px solid rgba(102, 126, 234, 0.3);">
+            <div style="font-size: 2rem; margin-bottom: 0.5rem;">📊</div>
+            <strong style="color: #ffffff;">Excel Spreadsheets</strong>
+            <p style="color: #cbd5e1; font-size: 0.9rem; margin: 0.5rem 0 0 0;">Data analysis, reports</p>
+        </div>
+        <div style="text-align: center; padding: 1.5rem; background: rgba(102, 126, 234, 0.1); border-radius: 15px; border: 1px solid rgba(102, 126, 234, 0.3);">
+            <div style="font-size: 2rem; margin-bottom: 0.5rem;">📃</div>
+            <strong style="color: #ffffff;">Text Files</strong>
+            <p style="color: #cbd5e1; font-size: 0.9rem; margin: 0.5rem 0 0 0;">Notes, logs, scripts</p>
+        </div>
+    </div>
+</div>
+"""
+
+UPLOAD_HTML = """
+<div class="upload-section">
+    <h2>Ready to Transform Your Workflow?</h2>
+    <p>Upload your documents or enter text to experience the future of document intelligence. Our AI will process your content and unlock insights you never knew existed.</p>
+"""
+
+# The history pieces are joined by single newlines into one st.markdown
+# call, so each is flush-left with no blank lines; otherwise Markdown ends
+# the HTML block and shows the indented turns after it as code
+HISTORY_HEADER_HTML = """
+<div class="chat-container">
+    <div class="chat-header">
+        <h2>📚 Conversation History</h2>
+        <p>Your previous questions and AI responses</p>
+    </div>
+""".strip()
+HISTORY_ITEM_HTML = """
+<div style="background: rgba(102, 126, 234, 0.1); border-radius: 15px; padding: 1.5rem; margin: 1rem 0; border-left: 4px solid #667eea;">
+    <div style="font-weight: 600; color: #667eea; margin-bottom: 0.5rem;">🤔 Question {number}:</div>
+    <div style="color: #ffffff;">{question}</div>
+</div>
+<div class="answer-container">
+    <h4>💡 Answer:</h4>
+    <div class="answer-content">{answer}</div>{sources}
+</div>
+""".strip()
+HISTORY_FOOTER_HTML = "</div>"
@@ -1,70 +1,242 @@
 from langchain_community.vectorstores import Chroma
 from langchain_community.embeddings import HuggingFaceEmbeddings
-from typing import List, Any
+from typing import List
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from functools import lru_cache
+import logging
 import numpy as np
+import os
+import shutil
+import threading
+import uuid
+from .embedding_cache import embed_documents_cached
+from .local_embeddings import LocalEmbeddings
+from .simple_vectorstore import create_simple_vector_store
 
-def create_vector_store(docs: List[Document]):
+logger = logging.getLogger(__name__)
+
+try:
+    import faiss
+    from langchain_community.vectorstores import FAISS
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_community.vectorstores.utils import DistanceStrategy
+except ImportError:
+    faiss = None
+
+class CachedQueryEmbeddings(Embeddings):
+    """
+    Wraps an embedding model and memoizes query embeddings, so repeated
+    questions skip the embedding call entirely.
+    """
+    
+    def __init__(self, embedding_model, maxsize: int = 256):
+        self.embedding_model = embedding_model
+        self.maxsize = maxsize
+        self._embed_query = lru_cache(maxsize=maxsize)(self._embed_query_uncached)
+    
+    def _embed_query_uncached(self, text: str) -> tuple:
+        return tuple(self.embedding_model.embed_query(text))
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embedding_model.embed_documents(texts)
+    
+    def embed_query(self, text: str) -> List[float]:
+        return list(self._embed_query(text))
+    
+    def __getstate__(self):
+        # The memoized bound method can't be pickled; it is rebuilt empty
+        return {"embedding_model": self.embedding_model, "maxsize": self.maxsize}
+    
+    def __setstate__(self, state):
+        self.__init__(state["embedding_model"], state["maxsize"])
+
+# Sentences per forward pass inside the sentence-transformer
+ENCODE_BATCH_SIZE = 64
+
+# Lightweight but effective embedding model shared by every vector store
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+# Serializes model loads, so a request arriving during the pre-warm waits
+# for that load instead of starting a second one
+_HF_LOAD_LOCK = threading.Lock()
+
+def _embedding_device() -> str:
+    """Returns "cuda" when a GPU is available, otherwise "cpu"."""
+    try:
+        # torch is already loaded by sentence-transformers; imported lazily here
+        import torch
+        return "cuda" if torch.cuda.is_available() else "cpu"
+    except ImportError:
+        return "cpu"
+
+def _get_hf_embeddings(model_name: str = DEFAULT_EMBEDDING_MODEL, device: str = None) -> HuggingFaceEmbeddings:
+    """
+    Returns the process-wide Hugging Face embedding model for
+    (model_name, device), loading it on first use.
+    """
+    device = device or _embedding_device()
+    with _HF_LOAD_LOCK:
+        return _load_hf_embeddings(model_name, device)
+
+@lru_cache(maxsize=2)
+def _load_hf_embeddings(model_name: str, device: str) -> HuggingFaceEmbeddings:
+    """
+    Loads a Hugging Face embedding model once per process and reuses it, so
+    each new vector store doesn't reload the model weights.
+    """
+    return HuggingFaceEmbeddings(
+        model_name=model_name,
+        model_kwargs={'device': device},
+        encode_kwargs={
+            'batch_size': ENCODE_BATCH_SIZE,
+            'normalize_embeddings': True,
+            'convert_to_numpy': True
+        },
+        cache_folder=None,  # Don't cache locally
+        local_files_only=False  # Allow downloading at runtime
+    )
+
+def _prewarm_embeddings():
+    try:
+        _get_hf_embeddings()
+    except Exception as e:
+        logger.warning("Embedding model pre-warm failed; it will load on first use: %s", e)
+
+# Load the default model in the background at import, so the first upload
+# doesn't pay for reading the weights
+threading.Thread(target=_prewarm_embeddings, name="embeddings-prewarm", daemon=True).start()
+
+def _create_faiss_store(docs: List[Document], embeddings: np.ndarray, embedding_model):
+    """
+    Builds a FAISS inner-product index from precomputed embeddings.
+
+    The vectors are stacked into one float32 matrix, L2-normalized in place and
+    added with a single ``index.add`` call, so inner product equals cosine
+    similarity and there is no per-vector Python overhead. Stored vectors are
+    scalar-quantized to 8 bits per dimension (4x less memory to scan per
+    query than float32); queries stay full precision.
+    """
+    matrix = np.vstack(embeddings).astype(np.float32)
+    faiss.normalize_L2(matrix)
+    
+    index = faiss.IndexScalarQuantizer(
+        matrix.shape[1], faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT
+    )
+    # Training only learns the per-dimension value ranges for quantization
+    index.train(matrix)
+    index.add(matrix)
+    
+    ids = [str(uuid.uuid4()) for _ in docs]
+    return FAISS(
+        embedding_function=embedding_model,
+        index=index,
+        docstore=InMemoryDocstore(dict(zip(ids, docs))),
+        index_to_docstore_id=dict(enumerate(ids)),
+        distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT
+    )
+
+def _get_embedding_model() -> Embeddings:
+    """Returns the query-memoizing embedding model shared by every vector store."""
+    # Try to use better embeddings first, fallback to local if needed
+    try:
+        embedding_model = _get_hf_embeddings()
+        logger.debug("Using Hugging Face embeddings for better context understanding")
+    except Exception as e:
+        logger.warning("Falling back to local embeddings: %s", e)
+        embedding_model = LocalEmbeddings()
+    return CachedQueryEmbeddings(embedding_model)
+
+def load_vector_store(persist_directory: str):
+    """
+    Reopens a vector store saved by ``create_vector_store``.
+
+    Args:
+        persist_directory: The directory the store was persisted to.
+
+    Returns:
+        The FAISS or ChromaDB store, or None if nothing usable was saved there.
+    """
+    if not os.path.isdir(persist_directory):
+        return None
+    
+    try:
+        if faiss is not None and os.path.exists(os.path.join(persist_directory, "index.faiss")):
+            # The docstore is a pickle this app wrote itself
+            return FAISS.load_local(
+                persist_directory,
+                _get_embedding_model(),
+                allow_dangerous_deserialization=True,
+                distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT
+            )
+        if os.path.exists(os.path.join(persist_directory, "chroma.sqlite3")):
+            return Chroma(persist_directory=persist_directory, embedding_function=_get_embedding_model())
+    except Exception as e:
+        logger.warning("Ignoring unreadable vector store in %s: %s", persist_directory, e)
+    return None
+
+def create_vector_store(docs: List[Document], persist_directory: str = None):
     """
     Creates a vector store from a list of documents.
-    Uses ChromaDB if possible, falls back to SQLite-independent alternatives.
+    Uses FAISS when installed, then ChromaDB, then SQLite-independent alternatives.
 
     Args:
         docs: A list of Document objects (chunks).
+        persist_directory: Optional directory to save a FAISS or ChromaDB store
+            to, so ``load_vector_store`` can reopen it without re-embedding.
 
     Returns:
-        A vector store instance (ChromaDB or fallback).
+        A vector store instance (FAISS, ChromaDB or fallback).
     """
     if not docs:
         raise ValueError("No documents provided to create vector store")
     
-    # Extract text content from documents
-    texts = []
-    for doc in docs:
-        if hasattr(doc, 'page_content') and doc.page_content:
-            texts.append(doc.page_content)
-        elif isinstance(doc, str):
-            texts.append(doc)
+    # Keep only documents with text content, so texts, metadatas and
+    # embeddings stay index-aligned for source attribution
+    docs = [Document(page_content=doc) if isinstance(doc, str) else doc for doc in docs]
+    docs = [doc for doc in docs if getattr(doc, 'page_content', None)]
+    texts = [doc.page_content for doc in docs]
+    metadatas = [doc.metadata for doc in docs]
     
     if not texts:
         raise ValueError("No text content found in documents")
     
-    # Try to use better embeddings first, fallback to local if needed
-    try:
-        # Use a lightweight but effective embedding model
-        embedding_model = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2",
-            model_kwargs={'device': 'cpu'},
-            cache_folder=None,  # Don't cache locally
-            local_files_only=False  # Allow downloading at runtime
-        )
-        print("Using Hugging Face embeddings for better context understanding")
-    except Exception as e:
-        print(f"Falling back to local embeddings: {e}")
-        embedding_model = LocalEmbeddings()
+    embedding_model = _get_embedding_model()
+    
+    # Embed every chunk once up front; the vectors are reused by whichever
+    # backend ends up holding them, and chunks seen in earlier runs are read
+    # back from the on-disk embedding cache
+    embeddings = embed_documents_cached(embedding_model, texts)
+    
+    if faiss is not None:
+        try:
+            vectorstore = _create_faiss_store(docs, embeddings, embedding_model)
+            if persist_directory:
+                vectorstore.save_local(persist_directory)
+            return vectorstore
+        except Exception as e:
+            logger.warning("FAISS index creation failed, falling back to ChromaDB: %s", e)
     
     try:
-        # Create the vector store from the documents and embedding model
-        vectorstore = Chroma.from_documents(
-            documents=docs,
-            embedding=embedding_model
+        # Create the vector store from the precomputed embeddings
+        vectorstore = Chroma(embedding_function=embedding_model, persist_directory=persist_directory)
+        vectorstore._collection.upsert(
+            ids=[str(uuid.uuid4()) for _ in texts],
+            embeddings=embeddings.tolist(),
+            documents=texts,
+            metadatas=metadatas
         )
         
         return vectorstore
         
     except Exception as e:
+        if persist_directory:
+            # Don't leave a half-written store behind for load_vector_store
+            shutil.rmtree(persist_directory, ignore_errors=True)
         # Check if it's a SQLite version error
         if "sqlite3" in str(e).lower() or "sqlite" in str(e).lower():
-            print("SQLite compatibility issue detected. Using SQLite-independent alternative...")
-            try:
-                # Import and use the simple vector store
-                from .simple_vectorstore import create_simple_vector_store
-                print("Using SQLite-independent simple vector store...")
-                return create_simple_vector_store(docs, embedding_model)
-            except ImportError as import_error:
-                # If import fails, try to create it inline
-                print(f"Import failed: {import_error}. Creating inline simple vector store...")
-                return _create_inline_vector_store(docs, embedding_model)
+            logger.warning("SQLite compatibility issue detected. Using SQLite-independent alternative...")
+            return create_simple_vector_store(docs, embedding_model, embeddings=embeddings)
         elif "groq_api_key" in str(e).lower() or "api_key" in str(e).lower():
             raise Exception(
                 "GROQ_API_KEY not found! Please add it to Streamlit Cloud secrets:\n"
@@ -74,127 +246,3 @@ def create_vector_store(docs: List[Document]):
             )
         else:
             raise Exception(f"Failed to create vector store: {e}")
-
-def _create_inline_vector_store(docs, embedding_model):
-    """Create a simple in-memory vector store when imports fail."""
-    print("Creating inline vector store...")
-    
-    # Simple in-memory storage
-    class InlineVectorStore:
-        def __init__(self, documents, embedding_model):
-            self.documents = documents
-            self.embedding_model = embedding_model
-            self.embeddings = []
-            
-            # Create embeddings
-            texts = [doc.page_content for doc in documents if doc.page_content]
-            try:
-                self.embeddings = embedding_model.embed_documents(texts)
-            except:
-                # Fallback to simple embeddings
-                import random
-                random.seed(42)
-                self.embeddings = [[random.random() for _ in range(384)] for _ in texts]
-        
-        def similarity_search(self, query, k=5):
-            # Simple similarity search
-            return self.documents[:k]
-        
-        def as_retriever(self, **kwargs):
-            # Import the SimpleRetriever from simple_vectorstore
-            try:
-                from .simple_vectorstore import SimpleRetriever
-                return SimpleRetriever(self)
-            except ImportError:
-                # Fallback inline retriever if import fails
-                class InlineRetriever:
-                    def __init__(self, store):
-                        self.store = store
-                    
-                    def get_relevant_documents(self, query):
-                        return self.store.similarity_search(query, k=5)
-                    
-                    def invoke(self, query):
-                        return self.get_relevant_documents(query)
-                
-                return InlineRetriever(self)
-    
-    return InlineVectorStore(docs, embedding_model)
-
-class LocalEmbeddings:
-    """
-    Vercel-optimized lightweight embedding model.
-    Creates simple vector representations without heavy dependencies.
-    """
-    
-    def __init__(self, dimensions=384):
-        self.dimensions = dimensions
-    
-    def embed_documents(self, texts):
-        """Create simple embeddings for documents."""
-        if not texts:
-            return []
-        
-        embeddings = []
-        for text in texts:
-            if not text or not text.strip():
-                # Handle empty text by creating a random vector
-                embedding = self._create_random_embedding()
-            else:
-                # Create a simple hash-based embedding
-                embedding = self._text_to_embedding(text)
-            embeddings.append(embedding)
-        
-        return embeddings
-    
-    def embed_query(self, text):
-        """Create embedding for a query."""
-        if not text or not text.strip():
-            return self._create_random_embedding()
-        return self._text_to_embedding(text)
-    
-    def _text_to_embedding(self, text):
-        """Convert text to a simple embedding vector."""
-        try:
-            import hashlib
-            
-            # Create a hash of the text
-            text_hash = hashlib.md5(text.encode()).hexdigest()
-            
-            # Convert hash to numbers (0-255)
-            numbers = [int(text_hash[i:i+2], 16) for i in range(0, len(text_hash), 2)]
-            
-            # Pad or truncate to desired dimensions
-            if len(numbers) < self.dimensions:
-                # Extend with pattern-based numbers
-                for i in range(len(numbers), self.dimensions):
-                    numbers.append((numbers[i % len(numbers)] + i) % 256)
-            else:
-                numbers = numbers[:self.dimensions]
-            
-            # Convert to float and normalize
-            vector = [float(num) / 255.0 for num in numbers]
-            
-            # Ensure we have exactly the right dimensions
-            assert len(vector) == self.dimensions, f"Vector length {len(vector)} != {self.dimensions}"
-            
-            return vector
-            
-        except Exception as e:
-            print(f"Error in text embedding: {e}")
-            return self._create_random_embedding()
-    
-    def _create_random_embedding(self):
-        """Create a random embedding when text processing fails."""
-        import random
-        
-        # Create a deterministic random vector
-        random.seed(42)  # Fixed seed for consistency
-        vector = [random.uniform(-1.0, 1.0) for _ in range(self.dimensions)]
-        
-        # Normalize to unit vector
-        magnitude = sum(x*x for x in vector) ** 0.5
-        if magnitude > 0:
-            vector = [x / magnitude for x in vector]
-        
-        return vector
\ No newline at end of file